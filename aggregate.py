@@ -0,0 +1,89 @@
+import itertools
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+
+from changelog import parse_timestamp
+
+# Upper bounds (in days) of the age histogram buckets; the last bucket is open-ended.
+AGE_BUCKETS_DAYS = [1, 7, 30, 90, 365]
+
+
+def field_labels(value: Any) -> List[str]:
+    """Turns a Jira field value into the label(s) it is grouped under.
+
+    Objects (status, user, priority, option) use their display name; multi-valued
+    fields such as labels or components count the issue once per value.
+    """
+    if value is None or value == []:
+        return ["(none)"]
+    if isinstance(value, list):
+        return sorted({label for item in value for label in field_labels(item)})
+    if isinstance(value, dict):
+        for key in ("displayName", "name", "value", "key"):
+            if value.get(key) is not None:
+                return [str(value[key])]
+        return [str(value.get("id", "(unknown)"))]
+    return [str(value)]
+
+
+def age_bucket(days: float) -> str:
+    lower = 0
+    for upper in AGE_BUCKETS_DAYS:
+        if days < upper:
+            return f"{lower}-{upper}d"
+        lower = upper
+    return f">={lower}d"
+
+
+class Aggregator:
+    """Incremental group-by over a stream of issues.
+
+    Only per-group counters are kept, so memory grows with the number of distinct
+    groups, not with the number of issues.
+    """
+
+    def __init__(self, group_by: List[str], sum_fields: Optional[List[str]] = None, age_field: Optional[str] = None, now: Optional[datetime] = None):
+        self.group_by = group_by
+        self.sum_fields = sum_fields or []
+        self.age_field = age_field
+        self.now = now or datetime.now(timezone.utc)
+        self.issues = 0
+        self.groups: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def add(self, issue: Dict[str, Any]) -> None:
+        self.issues += 1
+        fields = issue.get("fields") or {}
+        bucket = None
+        if self.age_field and fields.get(self.age_field):
+            days = (self.now - parse_timestamp(fields[self.age_field])).total_seconds() / 86400
+            bucket = age_bucket(days)
+
+        for key in itertools.product(*(field_labels(fields.get(name)) for name in self.group_by)):
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = {"count": 0, "sums": {name: 0.0 for name in self.sum_fields}, "ages": {}}
+            group["count"] += 1
+            for name in self.sum_fields:
+                value = fields.get(name)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    group["sums"][name] += value
+            if bucket:
+                group["ages"][bucket] = group["ages"].get(bucket, 0) + 1
+
+    def result(self, top: int = 50) -> Dict[str, Any]:
+        ordered = sorted(self.groups.items(), key=lambda item: item[1]["count"], reverse=True)
+        rows = []
+        for key, group in ordered[:top]:
+            row = dict(zip(self.group_by, key))
+            row["count"] = group["count"]
+            for name, total in group["sums"].items():
+                row[f"sum_{name}"] = round(total, 2)
+            if self.age_field:
+                row["age_days"] = group["ages"]
+            rows.append(row)
+        return {
+            "issues": self.issues,
+            "groups": len(self.groups),
+            "rows": rows,
+            "rows_omitted": max(0, len(ordered) - top)
+        }
@@ -0,0 +1,93 @@
+import os
+import asyncio
+import zipfile
+import httpx
+from typing import Optional, Dict, Any, List, Tuple
+
+from resilience import bulk_transfer
+
+
+def select_attachments(attachments: List[Dict[str, Any]], mime_type: str = "", max_file_bytes: int = 0, max_total_bytes: int = 0) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Filters attachments by MIME type prefix and size, using the sizes from the listing.
+
+    Returns (selected, skipped); each skipped entry gets a "reason". A limit of 0
+    means unlimited. Files are taken in listing order until the total budget is spent.
+    """
+    selected, skipped = [], []
+    total = 0
+    for attachment in attachments:
+        size = attachment.get("size") or 0
+        if mime_type and not (attachment.get("mime_type") or "").startswith(mime_type):
+            continue
+        if max_file_bytes and size > max_file_bytes:
+            skipped.append({**attachment, "reason": f"larger than {max_file_bytes} bytes"})
+        elif max_total_bytes and total + size > max_total_bytes:
+            skipped.append({**attachment, "reason": "total byte budget exhausted"})
+        else:
+            total += size
+            selected.append(attachment)
+    return selected, skipped
+
+
+async def download_all(attachments: List[Dict[str, Any]], headers: Dict[str, str], concurrency: int = 4, transport: Optional[httpx.AsyncBaseTransport] = None) -> Tuple[List[Tuple[Dict[str, Any], bytes]], List[Dict[str, Any]]]:
+    """Downloads each attachment's "url" over one connection pool, at most `concurrency` at a time.
+
+    Returns (files, failed). Files keep the order of `attachments`; a file that
+    could not be downloaded goes to `failed` with a "reason" instead of failing
+    the whole batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    with bulk_transfer():
+        async with httpx.AsyncClient(transport=transport, timeout=None if transport else httpx.USE_CLIENT_DEFAULT, follow_redirects=True) as client:
+            async def fetch(attachment: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+                async with semaphore:
+                    try:
+                        response = await client.get(attachment["url"], headers=headers)
+                        response.raise_for_status()
+                        return attachment, response.content
+                    except httpx.HTTPStatusError as e:
+                        return attachment, f"download failed: HTTP {e.response.status_code}"
+                    except httpx.HTTPError as e:
+                        return attachment, f"download failed: {str(e) or type(e).__name__}"
+
+            results = await asyncio.gather(*(fetch(a) for a in attachments))
+
+    files = [(a, content) for a, content in results if isinstance(content, bytes)]
+    failed = [{**a, "reason": reason} for a, reason in results if isinstance(reason, str)]
+    return files, failed
+
+
+def bundle_path(directory: Optional[str], name: str) -> str:
+    """Resolves a bundle file name inside `directory`, the only place bundles are written.
+
+    Raises ValueError when bundles are disabled (no directory), when `name` is not
+    a plain file name, or when the file already exists.
+    """
+    if not directory:
+        raise ValueError("Bundles are disabled; set ATLASSIAN_BUNDLE_DIR to allow them")
+    if not name or name in (".", "..") or "/" in name or "\\" in name:
+        raise ValueError(f"Invalid bundle name '{name}': use a plain file name, without directories")
+    if not name.endswith(".zip"):
+        name += ".zip"
+    path = os.path.join(directory, name)
+    if os.path.lexists(path):
+        raise ValueError(f"Bundle '{name}' already exists; choose another name")
+    return path
+
+
+def write_bundle(path: str, files: List[Tuple[Dict[str, Any], bytes]]) -> int:
+    """Writes downloaded attachments into a new zip file and returns the number of bytes stored.
+
+    Never overwrites: fails with FileExistsError if `path` exists, even as a symlink.
+    """
+    names = set()
+    total = 0
+    with zipfile.ZipFile(path, "x", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for attachment, content in files:
+            name = attachment["filename"]
+            if name in names:
+                name = f"{attachment['id']}_{name}"
+            names.add(name)
+            bundle.writestr(name, content)
+            total += len(content)
+    return total
@@ -0,0 +1,137 @@
+import os
+import mmap
+import tempfile
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+
+from page_patch import HEADING_PATTERN, heading_text
+
+logger = logging.getLogger("atlassian-mcp.body_store")
+
+
+def _snap(data, offset: int) -> int:
+    """Moves a byte offset back to the start of a UTF-8 character."""
+    offset = max(0, min(offset, len(data)))
+    while 0 < offset < len(data) and (data[offset] & 0xC0) == 0x80:
+        offset -= 1
+    return offset
+
+
+class BodyStore:
+    """Retains large page/issue bodies so follow-up reads can slice them locally.
+
+    Bodies are keyed by (kind, id, version) and exposed through a handle string.
+    They are stored as UTF-8; offsets and lengths are byte offsets, snapped to
+    character boundaries. Bodies above `spill_threshold` bytes are written to a
+    temporary file and memory-mapped instead of being held in memory. The store
+    keeps at most `max_entries` bodies (least recently used are dropped).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, spill_threshold: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.max_entries = max_entries or int(os.getenv("ATLASSIAN_BODY_STORE_ENTRIES", "64"))
+        self.spill_threshold = spill_threshold or int(os.getenv("ATLASSIAN_BODY_SPILL_BYTES", "262144"))
+        self.spill_dir = spill_dir or os.getenv("ATLASSIAN_BODY_SPILL_DIR") or None
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def handle(kind: str, item_id: str, version: Any) -> str:
+        return f"{kind}:{item_id}:{version}"
+
+    def put(self, kind: str, item_id: str, version: Any, text: str, with_sections: bool = False) -> str:
+        """Retains a body (no-op if this version is already held) and returns its handle."""
+        handle = self.handle(kind, item_id, version)
+        if handle in self._entries:
+            self._entries.move_to_end(handle)
+            return handle
+        # Older versions of the same item are never read again.
+        for stale in [h for h in self._entries if h.startswith(f"{kind}:{item_id}:")]:
+            self._drop(stale)
+
+        encoded = text.encode()
+        entry: Dict[str, Any] = {"size": len(encoded), "sections": self._index_sections(text) if with_sections else []}
+        if len(encoded) > self.spill_threshold:
+            spill = tempfile.NamedTemporaryFile(prefix="atlassian-body-", dir=self.spill_dir, delete=False)
+            spill.write(encoded)
+            spill.flush()
+            entry["file"] = spill
+            entry["data"] = mmap.mmap(spill.fileno(), 0, access=mmap.ACCESS_READ)
+            logger.debug(f"Spilled {handle} ({len(encoded)} bytes) to {spill.name}")
+        else:
+            entry["data"] = encoded
+        self._entries[handle] = entry
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+        return handle
+
+    def _index_sections(self, text: str) -> List[Dict[str, Any]]:
+        """Byte ranges of the content under each heading of a storage-format body.
+
+        A section ends at the next heading of the same or a higher level.
+        """
+        headings = list(HEADING_PATTERN.finditer(text))
+        # Character offsets -> UTF-8 byte offsets, computed incrementally.
+        byte_offsets: Dict[int, int] = {}
+        position, byte_position = 0, 0
+        for offset in sorted({m.end() for m in headings} | {m.start() for m in headings} | {len(text)}):
+            byte_position += len(text[position:offset].encode())
+            position = offset
+            byte_offsets[offset] = byte_position
+
+        sections = []
+        for index, match in enumerate(headings):
+            level = int(match.group(1))
+            end = next((h.start() for h in headings[index + 1:] if int(h.group(1)) <= level), len(text))
+            sections.append({
+                "heading": heading_text(match.group(2)),
+                "level": level,
+                "start": byte_offsets[match.end()],
+                "end": byte_offsets[end]
+            })
+        return sections
+
+    def _drop(self, handle: str) -> None:
+        entry = self._entries.pop(handle)
+        if "file" in entry:
+            entry["data"].close()
+            entry["file"].close()
+            os.unlink(entry["file"].name)
+
+    def has(self, handle: str) -> bool:
+        return handle in self._entries
+
+    def sections(self, handle: str) -> List[Dict[str, Any]]:
+        return self._entries[handle]["sections"]
+
+    def read(self, handle: str, offset: int = 0, length: Optional[int] = None, section: Optional[str] = None) -> Dict[str, Any]:
+        """Slices a retained body. Raises KeyError if the handle is unknown or evicted.
+
+        With `section`, offset/length are relative to that heading's section.
+        """
+        entry = self._entries[handle]
+        self._entries.move_to_end(handle)
+        data = entry["data"]
+        lower, upper = 0, entry["size"]
+        if section:
+            wanted = " ".join(section.split()).lower()
+            match = next((s for s in entry["sections"] if s["heading"].lower() == wanted), None)
+            if not match:
+                raise ValueError(f"Section not found: {section!r}")
+            lower, upper = match["start"], match["end"]
+
+        start = _snap(data, lower + max(0, offset))
+        end = upper if length is None else _snap(data, min(upper, start + length))
+        if end <= start < upper:
+            # A length shorter than one character still has to make progress.
+            end = _snap(data, min(upper, start + 4))
+        return {
+            "handle": handle,
+            "offset": start - lower,
+            "next_offset": end - lower if end < upper else None,
+            "total_bytes": upper - lower,
+            "text": bytes(data[start:end]).decode()
+        }
+
+    def close(self) -> None:
+        for handle in list(self._entries):
+            self._drop(handle)
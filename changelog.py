@@ -0,0 +1,96 @@
+import statistics
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Iterable
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parses Jira timestamps such as 2024-05-01T09:30:00.000+0000."""
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+
+
+def compact_changelog(histories: Iterable[Dict[str, Any]], fields: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Collapses raw change histories into per-field transitions.
+
+    Returns {field: [{"at", "by", "from", "to"}, ...]} in chronological order,
+    restricted to `fields` (case-insensitive) when given.
+    """
+    wanted = {f.lower() for f in fields} if fields else None
+    transitions: Dict[str, List[Dict[str, Any]]] = {}
+    for history in histories:
+        for item in history.get("items", []):
+            field = item.get("field")
+            if not field or (wanted and field.lower() not in wanted):
+                continue
+            transitions.setdefault(field, []).append({
+                "at": history.get("created"),
+                "by": history.get("author"),
+                "from": item.get("from"),
+                "to": item.get("to")
+            })
+    for entries in transitions.values():
+        entries.sort(key=lambda entry: entry["at"] or "")
+    return transitions
+
+
+def status_timeline(status_transitions: List[Dict[str, Any]], created: Optional[str] = None, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Turns status transitions into consecutive periods with their duration in hours.
+
+    The first period starts at `created` when known. The last one is still open and
+    is measured up to `now`.
+    """
+    now = now or datetime.now(timezone.utc)
+    periods = []
+    if status_transitions:
+        first = status_transitions[0]
+        if first["from"] is not None:
+            periods.append({"status": first["from"], "start": created, "end": first["at"]})
+    for current, following in zip(status_transitions, status_transitions[1:] + [None]):
+        periods.append({"status": current["to"], "start": current["at"], "end": following["at"] if following else None})
+
+    for period in periods:
+        if period["start"] is None:
+            period["hours"] = None
+            continue
+        end = parse_timestamp(period["end"]) if period["end"] else now
+        period["hours"] = round((end - parse_timestamp(period["start"])).total_seconds() / 3600, 2)
+    return periods
+
+
+def time_in_status(periods: List[Dict[str, Any]]) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for period in periods:
+        if period["hours"] is not None:
+            totals[period["status"]] = round(totals.get(period["status"], 0.0) + period["hours"], 2)
+    return totals
+
+
+def cycle_time_hours(status_transitions: List[Dict[str, Any]], start_statuses: List[str], end_statuses: List[str]) -> Optional[float]:
+    """Hours from first entering a start status to the next entry into an end status.
+
+    Returns None if the issue never started or has not finished yet.
+    """
+    starts = {s.lower() for s in start_statuses}
+    ends = {s.lower() for s in end_statuses}
+    started_at = None
+    for transition in status_transitions:
+        status = (transition["to"] or "").lower()
+        if started_at is None and status in starts:
+            started_at = parse_timestamp(transition["at"])
+        elif started_at is not None and status in ends:
+            return round((parse_timestamp(transition["at"]) - started_at).total_seconds() / 3600, 2)
+    return None
+
+
+def summarize_durations(hours: List[float]) -> Dict[str, Any]:
+    if not hours:
+        return {"count": 0}
+    ordered = sorted(hours)
+    p85_index = min(len(ordered) - 1, int(round(0.85 * (len(ordered) - 1))))
+    return {
+        "count": len(ordered),
+        "mean_hours": round(statistics.fmean(ordered), 2),
+        "median_hours": round(statistics.median(ordered), 2),
+        "p85_hours": ordered[p85_index],
+        "min_hours": ordered[0],
+        "max_hours": ordered[-1]
+    }
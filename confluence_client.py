@@ -1,9 +1,15 @@
 import os
 import httpx
 import base64
+import time
+import asyncio
 import logging
-from typing import Optional, Dict, Any, List
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from dotenv import load_dotenv
+from content_hash import HashRegistry
+from attachments import download_all
+from resilience import ResilientTransport, bulk_transfer
 
 load_dotenv()
 logger = logging.getLogger("atlassian-mcp.confluence")
@@ -24,6 +30,9 @@ class ConfluenceClient:
             "Accept": "application/json",
             "Content-Type": "application/json"
         }
+
+        # Shared by every request this client makes: hedging, circuit breakers, deadlines.
+        self.transport = ResilientTransport()
         
         # Confluence API v2 uses a different base for some endpoints, but let's stick to the URL provided
         # The provided URL is `.../wiki`. The REST API is usually at `.../wiki/rest/api` or `.../wiki/api/v2`
@@ -36,18 +45,52 @@ class ConfluenceClient:
         else:
              self.api_base = self.base_url
 
-    async def list_pages(self, space_key: Optional[str] = None, limit: int = 25) -> List[Dict[str, Any]]:
+        # Most recently read page bodies (LRU), reused when the page version is unchanged.
+        self._page_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._page_cache_size = int(os.getenv("CONFLUENCE_PAGE_CACHE_SIZE", "32"))
+        # Hash of title + body per page, tagged with the version it belongs to.
+        self.content_hashes = HashRegistry()
+        # Per-page filename -> attachment maps, valid while the page version is unchanged.
+        self._attachment_index: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._attachment_index_size = 256
+        self._attachment_index_ttl = float(os.getenv("CONFLUENCE_ATTACHMENT_INDEX_TTL", "300"))
+
+    def _cache_page(self, page: Dict[str, Any]) -> None:
+        self.content_hashes.record((page["id"],), (page["title"], page["body"]), tag=page["version"])
+        index = self._attachment_index.get(page["id"])
+        if index and index["page_version"] != page["version"]:
+            del self._attachment_index[page["id"]]
+        self._page_cache[page["id"]] = page
+        self._page_cache.move_to_end(page["id"])
+        while len(self._page_cache) > self._page_cache_size:
+            self._page_cache.popitem(last=False)
+
+    def _client(self, **kwargs) -> httpx.AsyncClient:
+        # Deadlines are enforced by the transport, per operation, instead of httpx's flat timeout.
+        return httpx.AsyncClient(transport=self.transport, timeout=None, **kwargs)
+
+    async def list_pages(self, space_key: Optional[str] = None, limit: int = 25, start: int = 0) -> List[Dict[str, Any]]:
+        pages, _ = await self.list_page_batch(space_key, limit, start)
+        return pages
+
+    async def list_page_batch(self, space_key: Optional[str] = None, limit: int = 25, start: int = 0) -> Tuple[List[Dict[str, Any]], bool]:
+        """Like list_pages, also reporting whether more pages follow (`_links.next`).
+
+        Confluence may return fewer than `limit` results per request, so a short
+        batch does not mean the listing is exhausted.
+        """
         space = space_key or self.default_space
         if not space:
             raise ValueError("No space key provided and no default configured")
             
         # Using content search
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.api_base}/content",
                 params={
                     "spaceKey": space,
                     "type": "page",
+                    "start": start,
                     "limit": limit,
                     "expand": "version"
                 },
@@ -55,7 +98,7 @@ class ConfluenceClient:
             )
             response.raise_for_status()
             data = response.json()
-            return [
+            pages = [
                 {
                     "id": page["id"],
                     "title": page["title"],
@@ -64,9 +107,32 @@ class ConfluenceClient:
                 }
                 for page in data.get("results", [])
             ]
+            return pages, bool(pages and (data.get("_links") or {}).get("next"))
+
+    async def list_spaces(self, page_size: int = 100) -> List[Dict[str, Any]]:
+        """Gets all visible spaces, following `start`/`limit` pagination."""
+        spaces = []
+        start = 0
+        async with self._client() as client:
+            while True:
+                response = await client.get(
+                    f"{self.api_base}/space",
+                    params={"start": start, "limit": page_size},
+                    headers=self.auth_header
+                )
+                response.raise_for_status()
+                data = response.json()
+                results = data.get("results", [])
+                spaces.extend(
+                    {"id": space.get("id"), "key": space.get("key"), "name": space.get("name"), "type": space.get("type")}
+                    for space in results
+                )
+                if not results or not (data.get("_links") or {}).get("next"):
+                    return spaces
+                start += len(results)
 
     async def get_page(self, page_id: str) -> Dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.api_base}/content/{page_id}",
                 params={"expand": "body.storage,version"},
@@ -74,21 +140,48 @@ class ConfluenceClient:
             )
             response.raise_for_status()
             data = response.json()
-            return {
+            page = {
                 "id": data["id"],
                 "title": data["title"],
                 "version": data["version"]["number"],
                 "body": data["body"]["storage"]["value"]
             }
+            self._cache_page(page)
+            return page
+
+    async def get_page_version(self, page_id: str) -> int:
+        """Gets only the current version number of a page (no body)."""
+        async with self._client() as client:
+            response = await client.get(
+                f"{self.api_base}/content/{page_id}",
+                params={"expand": "version"},
+                headers=self.auth_header
+            )
+            response.raise_for_status()
+            return response.json()["version"]["number"]
+
+    async def get_page_cached(self, page_id: str) -> Dict[str, Any]:
+        """Like get_page, but reuses a cached body when the page version has not moved."""
+        cached = self._page_cache.get(page_id)
+        if cached and await self.get_page_version(page_id) == cached["version"]:
+            logger.debug(f"Page {page_id} v{cached['version']} served from cache")
+            self._page_cache.move_to_end(page_id)
+            return cached
+        return await self.get_page(page_id)
 
     async def update_page(self, page_id: str, title: str, content: str, version: Optional[int] = None) -> Dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+        """Updates a page. Identical content is not re-saved (no new version is created);
+        the result then carries `"skipped": True` and the current version."""
+        async with self._client() as client:
             # If version is not provided, fetch the current version first
             if version is None:
-                current_page = await self.get_page(page_id)
-                current_version = current_page["version"]
+                current_version = await self.get_page_version(page_id)
                 version = current_version + 1
-            
+
+            if self.content_hashes.matches((page_id,), (title, content), tag=version - 1):
+                logger.info(f"update_page: page {page_id} v{version - 1} unchanged, skipping write")
+                return {"id": page_id, "title": title, "version": {"number": version - 1}, "skipped": True}
+
             payload = {
                 "id": page_id,
                 "type": "page",
@@ -109,14 +202,23 @@ class ConfluenceClient:
                 headers=self.auth_header
             )
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            new_version = (data.get("version") or {}).get("number", version)
+            # Re-sending this content is a no-op, but Confluence normalizes storage format on
+            # save, so the body it now holds is not cached; the next read fetches it.
+            self.content_hashes.record((page_id,), (title, content), tag=new_version)
+            self._page_cache.pop(page_id, None)
+            index = self._attachment_index.get(page_id)
+            if index and index["page_version"] != new_version:
+                del self._attachment_index[page_id]
+            return data
     async def create_page(self, title: str, content: str, parent_id: Optional[str] = None, space_key: Optional[str] = None) -> Dict[str, Any]:
         """Creates a new page in Confluence."""
         space = space_key or self.default_space
         if not space:
             raise ValueError("No space key provided and no default configured")
 
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             payload = {
                 "title": title,
                 "type": "page",
@@ -143,7 +245,7 @@ class ConfluenceClient:
 
     async def delete_page(self, page_id: str) -> None:
         """Deletes a page in Confluence."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.delete(
                 f"{self.api_base}/content/{page_id}",
                 headers=self.auth_header
@@ -152,7 +254,7 @@ class ConfluenceClient:
 
     async def search(self, cql: str, limit: int = 25) -> List[Dict[str, Any]]:
         """Searches Confluence using CQL."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.api_base}/content/search",
                 params={
@@ -176,7 +278,7 @@ class ConfluenceClient:
 
     async def get_comments(self, page_id: str) -> List[Dict[str, Any]]:
         """Gets all comments for a Confluence page."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.api_base}/content/{page_id}/child/comment",
                 params={"expand": "body.storage,version"},
@@ -196,7 +298,7 @@ class ConfluenceClient:
 
     async def add_comment(self, page_id: str, body: str, parent_comment_id: Optional[str] = None) -> Dict[str, Any]:
         """Adds a comment to a Confluence page. Optionally replies to an existing comment."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             payload = {
                 "type": "comment",
                 "container": {
@@ -222,37 +324,186 @@ class ConfluenceClient:
             response.raise_for_status()
             return response.json()
 
+    async def get_attachment_index(self, page_id: str, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Gets a page's attachments keyed by filename (ID, version, media type, download URL).
+
+        Built from one paginated listing and reused until the page is seen at a
+        different version (via get_page/update_page), the entry is older than
+        CONFLUENCE_ATTACHMENT_INDEX_TTL seconds, or `refresh` is set.
+        """
+        by_filename, _ = await self._load_attachment_index(page_id, refresh)
+        return by_filename
+
+    async def _load_attachment_index(self, page_id: str, refresh: bool = False) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """get_attachment_index, also reporting whether the index was (re)built by this call."""
+        entry = self._attachment_index.get(page_id)
+        if entry and not refresh and time.monotonic() - entry["built_at"] < self._attachment_index_ttl:
+            self._attachment_index.move_to_end(page_id)
+            return entry["by_filename"], False
+
+        attachments, page_version = await asyncio.gather(self.list_attachments(page_id), self.get_page_version(page_id))
+        self._attachment_index[page_id] = {
+            "page_version": page_version,
+            "built_at": time.monotonic(),
+            "by_filename": {a["filename"]: a for a in attachments}
+        }
+        while len(self._attachment_index) > self._attachment_index_size:
+            self._attachment_index.popitem(last=False)
+        logger.debug(f"Indexed {len(attachments)} attachments on page {page_id} v{page_version}")
+        return self._attachment_index[page_id]["by_filename"], True
+
     async def get_attachment_image(self, page_id: str, filename: str) -> Optional[bytes]:
         """Gets the binary content of an image attachment on a page."""
-        async with httpx.AsyncClient() as client:
-            # 1. Find the attachment ID by filename
-            search_url = f"{self.api_base}/content/{page_id}/child/attachment"
+        by_filename, rebuilt = await self._load_attachment_index(page_id)
+        attachment = by_filename.get(filename)
+        if attachment is None and not rebuilt:
+            # The file may have been uploaded after the index was built.
+            attachment = (await self.get_attachment_index(page_id, refresh=True)).get(filename)
+        if attachment is None:
+            return None
+
+        async with self._client() as client:
+            with bulk_transfer():
+                img_response = await client.get(attachment["url"], headers=self.auth_header, follow_redirects=True)
+            img_response.raise_for_status()
+            return img_response.content
+
+    async def _iter_child_pages(self, client: httpx.AsyncClient, page_id: str, expand: str, page_size: int = 50) -> AsyncIterator[Dict[str, Any]]:
+        """Yields every direct child page of a page, following `start`/`limit` pagination."""
+        start = 0
+        while True:
             response = await client.get(
-                search_url,
-                params={"filename": filename, "expand": "version"},
+                f"{self.api_base}/content/{page_id}/child/page",
+                params={"start": start, "limit": page_size, "expand": expand},
                 headers=self.auth_header
             )
             response.raise_for_status()
             data = response.json()
             results = data.get("results", [])
-            
-            if not results:
-                return None
-            
-            # 2. Get the download URL (API v1 style)
-            # The download path is usually relative, e.g., /wiki/download/attachments/...
-            attachment = results[0]
-            download_path = attachment.get("_links", {}).get("download")
-            if not download_path:
-                return None
-                
-            # Construct full URL. self.api_base is .../wiki/rest/api, so we need base .../wiki
-            # If api_base is "https://domain.atlassian.net/wiki/rest/api", split at /rest
-            base_url = self.api_base.split("/rest")[0] 
-            full_download_url = f"{base_url}{download_path}"
-
-            # 3. Download the binary content
-            img_response = await client.get(full_download_url, headers=self.auth_header)
-            img_response.raise_for_status()
-            return img_response.content
+            for page in results:
+                yield page
+            if not results or not (data.get("_links") or {}).get("next"):
+                return
+            start += len(results)
+
+    async def crawl_page_tree(self, root_id: str, max_depth: int = 3, max_pages: int = 200, concurrency: int = 5, include_body: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Walks the descendants of a page breadth-first, yielding pages as they arrive.
+
+        Child listings run on up to `concurrency` workers. Each page is yielded once
+        (with its `parent_id` and `depth`), the root first at depth 0. The crawl stops
+        descending past `max_depth` and stops entirely after `max_pages` pages.
+        """
+        expand = "version,body.storage" if include_body else "version"
+
+        def to_node(page: Dict[str, Any], parent_id: Optional[str], depth: int) -> Dict[str, Any]:
+            node = {
+                "id": page["id"],
+                "title": page.get("title"),
+                "version": (page.get("version") or {}).get("number"),
+                "parent_id": parent_id,
+                "depth": depth
+            }
+            if include_body:
+                node["body"] = ((page.get("body") or {}).get("storage") or {}).get("value", "")
+            return node
+
+        async with self._client() as client:
+            response = await client.get(
+                f"{self.api_base}/content/{root_id}",
+                params={"expand": expand},
+                headers=self.auth_header
+            )
+            response.raise_for_status()
+            root = to_node(response.json(), None, 0)
+
+            seen = {root["id"]}
+            emitted = 1
+            yield root
+            if max_depth < 1 or max_pages <= 1:
+                return
+
+            pending: asyncio.Queue = asyncio.Queue()
+            found: asyncio.Queue = asyncio.Queue(maxsize=max(concurrency * 4, 16))
+            pending.put_nowait((root["id"], 0))
+
+            async def worker() -> None:
+                while True:
+                    page_id, depth = await pending.get()
+                    try:
+                        async for child in self._iter_child_pages(client, page_id, expand):
+                            if child["id"] in seen:
+                                continue
+                            seen.add(child["id"])
+                            node = to_node(child, page_id, depth + 1)
+                            await found.put(node)
+                            if depth + 1 < max_depth:
+                                pending.put_nowait((child["id"], depth + 1))
+                    except Exception as e:
+                        await found.put(e)
+                    finally:
+                        pending.task_done()
+
+            async def watch_done() -> None:
+                await pending.join()
+                await found.put(None)
+
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+            watcher = asyncio.create_task(watch_done())
+            try:
+                while emitted < max_pages:
+                    item = await found.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    emitted += 1
+                    yield item
+            finally:
+                for task in workers + [watcher]:
+                    task.cancel()
+                await asyncio.gather(*workers, watcher, return_exceptions=True)
+
+    async def list_attachments(self, page_id: str, page_size: int = 100) -> List[Dict[str, Any]]:
+        """Lists all attachments on a page with their download URLs."""
+        # Download links are relative to the site (e.g. /wiki/download/...), not to the REST base.
+        site_base = self.api_base.split("/rest")[0]
+        attachments = []
+        start = 0
+        async with self._client() as client:
+            while True:
+                response = await client.get(
+                    f"{self.api_base}/content/{page_id}/child/attachment",
+                    params={"start": start, "limit": page_size, "expand": "version"},
+                    headers=self.auth_header
+                )
+                response.raise_for_status()
+                data = response.json()
+                results = data.get("results", [])
+                attachments.extend(
+                    {
+                        "id": a.get("id"),
+                        "filename": a.get("title"),
+                        "mime_type": (a.get("extensions") or {}).get("mediaType") or (a.get("metadata") or {}).get("mediaType"),
+                        "size": (a.get("extensions") or {}).get("fileSize"),
+                        "version": (a.get("version") or {}).get("number"),
+                        "url": self._latest_download_url(site_base, (a.get("_links") or {}).get("download", ""))
+                    }
+                    for a in results
+                )
+                if not results or not (data.get("_links") or {}).get("next"):
+                    return attachments
+                start += len(results)
+
+    @staticmethod
+    def _latest_download_url(site_base: str, link: str) -> str:
+        # Download links pin the version they were listed at (?version=N&modificationDate=...).
+        # Re-uploading a file does not change the page version, so always ask for the latest.
+        url = httpx.URL(f"{site_base}{link}")
+        for param in ("version", "modificationDate"):
+            url = url.copy_remove_param(param)
+        return str(url)
 
+    async def download_attachments(self, attachments: List[Dict[str, Any]], concurrency: int = 4) -> Tuple[List[Tuple[Dict[str, Any], bytes]], List[Dict[str, Any]]]:
+        """Downloads attachments from list_attachments concurrently.
+        Returns (files, failed) as attachments.download_all does."""
+        return await download_all(attachments, self.auth_header, concurrency, self.transport)
@@ -0,0 +1,74 @@
+import re
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Any, Tuple
+
+# Whitespace between two block-level tags is formatting; between inline tags
+# ("<strong>a</strong> <em>b</em>") it is a real space and must be kept.
+BLOCK_TAGS = r"(?:p|h[1-6]|ul|ol|li|table|thead|tbody|tfoot|tr|th|td|div|blockquote|hr)"
+BLOCK_TAG_WHITESPACE = re.compile(rf"(</?{BLOCK_TAGS}\b[^>]*>)\s+(?=</?{BLOCK_TAGS}\b)", re.IGNORECASE)
+
+
+def normalize(value: Any) -> str:
+    """Canonical form used for change detection.
+
+    Structured values (ADF documents, label lists) become key-sorted compact JSON.
+    Strings get line endings unified, surrounding whitespace stripped and
+    whitespace between block-level tags dropped, so formatting-only differences
+    in storage-format bodies do not count as changes. Tuples combine several values
+    (e.g. a page title and body) into one key.
+    """
+    if isinstance(value, tuple):
+        return "\x00".join(normalize(part) for part in value)
+    if isinstance(value, str):
+        text = value.replace("\r\n", "\n").strip()
+        return BLOCK_TAG_WHITESPACE.sub(r"\1", text)
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def content_hash(value: Any) -> str:
+    return hashlib.sha256(normalize(value).encode()).hexdigest()
+
+
+class HashRegistry:
+    """Remembers the hash of the last known content per key (issue field, page).
+
+    Entries can carry a tag (e.g. a page version) that must also match, and expire
+    after `ttl` seconds when one is set. The registry is bounded (LRU).
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[str, Any, float]]" = OrderedDict()
+
+    def record(self, key: Tuple[str, ...], value: Any, tag: Any = None) -> None:
+        self._entries[key] = (content_hash(value), tag, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _entry(self, key: Tuple[str, ...]) -> Optional[Tuple[str, Any, float]]:
+        entry = self._entries.get(key)
+        if entry and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+            del self._entries[key]
+            return None
+        return entry
+
+    def matches(self, key: Tuple[str, ...], value: Any, tag: Any = None) -> bool:
+        """True if `value` is known to equal the current content for `key`."""
+        entry = self._entry(key)
+        if not entry:
+            return False
+        known_hash, known_tag, _ = entry
+        return known_tag == tag and known_hash == content_hash(value)
+
+    def tag(self, key: Tuple[str, ...]) -> Any:
+        """The tag `key` was recorded with, or None if it is unknown."""
+        entry = self._entry(key)
+        return entry[1] if entry else None
+
+    def forget(self, key: Tuple[str, ...]) -> None:
+        self._entries.pop(key, None)
@@ -0,0 +1,178 @@
+import os
+import json
+import gzip
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from resilience import bulk_transfer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("atlassian-mcp.exporter")
+
+# Fetches one listing page: cursor -> (items, next cursor or None when exhausted).
+ListBatch = Callable[[Any], Awaitable[Tuple[List[Dict[str, Any]], Any]]]
+# Fetches the full record for one listed item.
+FetchRecord = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def _open_frame(raw, compression: str):
+    """Opens a new compressed member/frame appended to the raw file.
+
+    Both gzip and zstd decoders read concatenated members as one stream, so every
+    batch gets its own member and the file is valid after each checkpoint.
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb")
+    if compression == "zstd":
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def _checkpoint_path(path: str) -> str:
+    return f"{path}.checkpoint.json"
+
+
+def _load_checkpoint(path: str, source: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_checkpoint_path(path)) as f:
+            checkpoint = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if checkpoint.get("source") != source or checkpoint.get("complete"):
+        return None
+    return checkpoint
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    tmp_path = f"{_checkpoint_path(path)}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, _checkpoint_path(path))
+
+
+async def run_export(path: str, source: str, list_batch: ListBatch, fetch_record: FetchRecord, concurrency: int = 8, compression: str = "gzip", prefetch_batches: int = 2) -> Dict[str, Any]:
+    """Streams a paginated listing into compressed JSONL with resumable checkpoints.
+
+    A producer task pages through the listing (at most `prefetch_batches` ahead),
+    details for each batch are fetched on `concurrency` concurrent requests and
+    written as they complete. After each batch the compressed member is closed and
+    a checkpoint records the listing cursor and the file offset, so an interrupted
+    export truncates back to the last checkpoint and resumes from its cursor.
+    Memory use is bounded by the batch size, not by the size of the export.
+    """
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("zstd compression requires the 'zstandard' package")
+
+    checkpoint = _load_checkpoint(path, source)
+    resumed = checkpoint is not None
+    if checkpoint:
+        logger.info(f"Resuming export of {source} at {checkpoint['records']} records")
+    else:
+        checkpoint = {"source": source, "compression": compression, "cursor": None, "offset": 0, "records": 0, "complete": False}
+    compression = checkpoint["compression"]
+
+    batches: asyncio.Queue = asyncio.Queue(maxsize=prefetch_batches)
+
+    async def produce() -> None:
+        cursor = checkpoint["cursor"]
+        while True:
+            items, next_cursor = await list_batch(cursor)
+            await batches.put((items, next_cursor))
+            if next_cursor is None:
+                await batches.put(None)
+                return
+            cursor = next_cursor
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(item: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await fetch_record(item)
+
+    producer = asyncio.create_task(produce())
+    mode = "r+b" if resumed and os.path.exists(path) else "wb"
+    try:
+        with open(path, mode) as raw:
+            raw.seek(checkpoint["offset"])
+            raw.truncate()
+            while True:
+                # Surface listing errors instead of waiting forever on an empty queue.
+                getter = asyncio.ensure_future(batches.get())
+                await asyncio.wait([getter, producer], return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done() and producer.exception():
+                    getter.cancel()
+                    raise producer.exception()
+                batch = await getter
+                if batch is None:
+                    break
+                items, next_cursor = batch
+
+                frame = _open_frame(raw, compression)
+                tasks = [asyncio.create_task(fetch(item)) for item in items]
+                try:
+                    for done in asyncio.as_completed(tasks):
+                        record = await done
+                        frame.write((json.dumps(record, default=str) + "\n").encode())
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    frame.close()
+                raw.flush()
+                os.fsync(raw.fileno())
+
+                checkpoint["cursor"] = next_cursor
+                checkpoint["offset"] = raw.tell()
+                checkpoint["records"] += len(items)
+                # Saved together with the last cursor, so a crash can't leave a finished
+                # export looking like one that has not started.
+                checkpoint["complete"] = next_cursor is None
+                _save_checkpoint(path, checkpoint)
+                logger.debug(f"Export checkpoint for {source}: {checkpoint['records']} records")
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+    logger.info(f"Exported {checkpoint['records']} records from {source} to {path}")
+    return {
+        "path": path,
+        "records": checkpoint["records"],
+        "bytes": checkpoint["offset"],
+        "compression": compression,
+        "resumed": resumed
+    }
+
+
+async def export_confluence_space(confluence, space_key: str, path: str, concurrency: int = 8, compression: str = "gzip", page_size: int = 50) -> Dict[str, Any]:
+    """Exports every page in a Confluence space (ID, title, version, storage body)."""
+
+    async def list_batch(start: Optional[int]) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        start = start or 0
+        pages, more = await confluence.list_page_batch(space_key, page_size, start)
+        return pages, start + len(pages) if more else None
+
+    async def fetch_record(page: Dict[str, Any]) -> Dict[str, Any]:
+        # Page bodies can be large: a stalled transfer fails, a slow one doesn't.
+        with bulk_transfer():
+            return await confluence.get_page(page["id"])
+
+    return await run_export(path, f"confluence:{space_key}", list_batch, fetch_record, concurrency, compression)
+
+
+async def export_jira_project(jira, project_key: str, path: str, concurrency: int = 8, compression: str = "gzip", page_size: int = 100) -> Dict[str, Any]:
+    """Exports every issue in a Jira project as returned by the issue endpoint."""
+    jql = f'project = "{project_key}" ORDER BY key ASC'
+
+    async def list_batch(token: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        result = await jira.list_issues(jql, token, page_size)
+        return result["issues"], result.get("next_page_token")
+
+    async def fetch_record(issue: Dict[str, Any]) -> Dict[str, Any]:
+        with bulk_transfer():
+            return await jira.get_issue(issue["key"])
+
+    return await run_export(path, f"jira:{project_key}", list_batch, fetch_record, concurrency, compression)
@@ -2,8 +2,11 @@ import os
 import httpx
 import base64
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
 from dotenv import load_dotenv
+from content_hash import HashRegistry
+from attachments import download_all
+from resilience import ResilientTransport, bulk_transfer
 
 load_dotenv()
 logger = logging.getLogger("atlassian-mcp.jira")
@@ -24,6 +27,17 @@ class JiraClient:
             "Content-Type": "application/json"
         }
 
+        # Shared by every request this client makes: hedging, circuit breakers, deadlines.
+        self.transport = ResilientTransport()
+
+        # Last read content of writable fields, tagged with the issue's `updated`
+        # timestamp, used to skip no-op updates. Entries also expire after a TTL.
+        self.content_hashes = HashRegistry(ttl=float(os.getenv("JIRA_CONTENT_HASH_TTL", "300")))
+
+    def _client(self, **kwargs) -> httpx.AsyncClient:
+        # Deadlines are enforced by the transport, per operation, instead of httpx's flat timeout.
+        return httpx.AsyncClient(transport=self.transport, timeout=None, **kwargs)
+
     async def list_issues(self, jql: str = "created is not empty order by created DESC", next_page_token: Optional[str] = None, max_results: int = 50) -> Dict[str, Any]:
         logger.debug(f"list_issues: jql='{jql}', next_page_token={next_page_token}, max_results={max_results}")
         payload = {
@@ -34,7 +48,7 @@ class JiraClient:
         if next_page_token:
             payload["nextPageToken"] = next_page_token
             
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/search/jql",
                 json=payload,
@@ -60,18 +74,48 @@ class JiraClient:
                 "next_page_token": data.get("nextPageToken")
             }
 
-    async def get_issue(self, issue_key: str) -> Dict[str, Any]:
-        async with httpx.AsyncClient() as client:
+    async def iter_issues(self, jql: str, fields: List[str], page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Yields every issue matching JQL (raw, with only `fields`), following nextPageToken."""
+        next_page_token = None
+        async with self._client() as client:
+            while True:
+                payload = {"jql": jql, "maxResults": page_size, "fields": fields}
+                if next_page_token:
+                    payload["nextPageToken"] = next_page_token
+                response = await client.post(
+                    f"{self.base_url}/search/jql",
+                    json=payload,
+                    headers=self.auth_header
+                )
+                response.raise_for_status()
+                data = response.json()
+                for issue in data.get("issues", []):
+                    yield issue
+                next_page_token = data.get("nextPageToken")
+                if not next_page_token or not data.get("issues"):
+                    return
+
+    async def get_issue(self, issue_key: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        params = {"fields": ",".join(fields)} if fields else None
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/issue/{issue_key}",
+                params=params,
                 headers=self.auth_header
             )
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            issue_fields = data.get("fields") or {}
+            # Without `updated` there is no way to tell later whether the content is still current.
+            if issue_fields.get("updated"):
+                for name in ("summary", "description", "labels"):
+                    if name in issue_fields:
+                        self.content_hashes.record((issue_key, name), issue_fields[name], tag=issue_fields["updated"])
+            return data
 
     async def add_comment(self, issue_key: str, comment_body: Any) -> Dict[str, Any]:
         """Adds a comment to an issue."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             if isinstance(comment_body, str):
                 payload = {
                     "body": {
@@ -103,7 +147,7 @@ class JiraClient:
 
     async def get_comments(self, issue_key: str) -> List[Dict[str, Any]]:
         """Gets all comments for an issue."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/issue/{issue_key}/comment",
                 headers=self.auth_header
@@ -121,9 +165,40 @@ class JiraClient:
             ]
 
 
+    async def iter_changelog(self, issue_key: str, page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Yields an issue's change history oldest first, paging through /issue/{key}/changelog."""
+        start_at = 0
+        async with self._client() as client:
+            while True:
+                response = await client.get(
+                    f"{self.base_url}/issue/{issue_key}/changelog",
+                    params={"startAt": start_at, "maxResults": page_size},
+                    headers=self.auth_header
+                )
+                response.raise_for_status()
+                data = response.json()
+                values = data.get("values", [])
+                for history in values:
+                    yield {
+                        "id": history.get("id"),
+                        "author": (history.get("author") or {}).get("displayName", "Unknown"),
+                        "created": history.get("created"),
+                        "items": [
+                            {
+                                "field": item.get("field"),
+                                "from": item.get("fromString"),
+                                "to": item.get("toString")
+                            }
+                            for item in history.get("items", [])
+                        ]
+                    }
+                start_at += len(values)
+                if data.get("isLast") or not values or start_at >= data.get("total", start_at):
+                    return
+
     async def get_transitions(self, issue_key: str) -> List[Dict[str, Any]]:
         """Gets available transitions for an issue."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/issue/{issue_key}/transitions",
                 headers=self.auth_header
@@ -133,7 +208,7 @@ class JiraClient:
 
     async def transition_issue(self, issue_key: str, transition_id: str) -> None:
         """Transitions an issue to a new status."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             payload = {
                 "transition": {
                     "id": transition_id
@@ -148,7 +223,7 @@ class JiraClient:
 
     async def get_attachment_content(self, attachment_id: str) -> Optional[bytes]:
         """Gets attachment content by ID."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             # The standard endpoint for content is /rest/api/3/attachment/content/{id}
             # However, sometimes we need to follow the 'content' link from metadata.
             # But usually, directly accessing the content URL works if we know the ID.
@@ -165,14 +240,94 @@ class JiraClient:
             if not content_url:
                 return None
                 
-            img_response = await client.get(content_url, headers=self.auth_header, follow_redirects=True)
+            with bulk_transfer():
+                img_response = await client.get(content_url, headers=self.auth_header, follow_redirects=True)
             img_response.raise_for_status()
             return img_response.content
 
 
-    async def update_issue(self, issue_key: str, fields: Dict[str, Any]) -> None:
-        """Updates fields of an issue."""
-        async with httpx.AsyncClient() as client:
+    async def get_projects(self, page_size: int = 50) -> List[Dict[str, Any]]:
+        """Gets all visible projects with the issue types available in each."""
+        projects = []
+        start_at = 0
+        async with self._client() as client:
+            while True:
+                response = await client.get(
+                    f"{self.base_url}/project/search",
+                    params={"startAt": start_at, "maxResults": page_size, "expand": "issueTypes"},
+                    headers=self.auth_header
+                )
+                response.raise_for_status()
+                data = response.json()
+                values = data.get("values", [])
+                projects.extend(
+                    {
+                        "id": project.get("id"),
+                        "key": project.get("key"),
+                        "name": project.get("name"),
+                        "issue_types": [
+                            {"id": t.get("id"), "name": t.get("name"), "subtask": t.get("subtask", False)}
+                            for t in project.get("issueTypes", [])
+                        ]
+                    }
+                    for project in values
+                )
+                start_at += len(values)
+                if data.get("isLast") or not values:
+                    return projects
+
+    async def get_fields(self) -> List[Dict[str, Any]]:
+        """Gets all system and custom fields (ID, name, type)."""
+        async with self._client() as client:
+            response = await client.get(
+                f"{self.base_url}/field",
+                headers=self.auth_header
+            )
+            response.raise_for_status()
+            return [
+                {
+                    "id": field.get("id"),
+                    "name": field.get("name"),
+                    "custom": field.get("custom", False),
+                    "type": (field.get("schema") or {}).get("type")
+                }
+                for field in response.json()
+            ]
+
+    async def list_attachments(self, issue_key: str) -> List[Dict[str, Any]]:
+        """Lists an issue's attachments, including their direct content URLs."""
+        issue = await self.get_issue(issue_key, fields=["attachment"])
+        return [
+            {
+                "id": a.get("id"),
+                "filename": a.get("filename"),
+                "mime_type": a.get("mimeType"),
+                "size": a.get("size"),
+                "url": a.get("content")
+            }
+            for a in (issue.get("fields") or {}).get("attachment", [])
+        ]
+
+    async def download_attachments(self, attachments: List[Dict[str, Any]], concurrency: int = 4) -> Tuple[List[Tuple[Dict[str, Any], bytes]], List[Dict[str, Any]]]:
+        """Downloads attachments from list_attachments concurrently (no per-file metadata request).
+        Returns (files, failed) as attachments.download_all does."""
+        return await download_all(attachments, self.auth_header, concurrency, self.transport)
+
+    async def update_issue(self, issue_key: str, fields: Dict[str, Any]) -> bool:
+        """Updates fields of an issue.
+
+        Returns False without writing when every field already holds the given
+        content as last read and the issue has not been updated since, True when the
+        update was sent. Only a would-be skip costs an extra request (for `updated`).
+        """
+        tags = {self.content_hashes.tag((issue_key, name)) for name in fields}
+        known = tags.pop() if len(tags) == 1 else None
+        if known is not None and all(self.content_hashes.matches((issue_key, name), value, tag=known) for name, value in fields.items()):
+            updated = (await self.get_issue(issue_key, fields=["updated"]))["fields"].get("updated")
+            if updated == known:
+                logger.info(f"update_issue: {issue_key} unchanged, skipping write")
+                return False
+        async with self._client() as client:
             payload = {"fields": fields}
             response = await client.put(
                 f"{self.base_url}/issue/{issue_key}",
@@ -180,10 +335,14 @@ class JiraClient:
                 headers=self.auth_header
             )
             response.raise_for_status()
+        # The new `updated` timestamp is unknown until the issue is read again.
+        for name in fields:
+            self.content_hashes.forget((issue_key, name))
+        return True
 
     async def create_issue(self, project_key: str, summary: str, description: Any = None, issuetype: str = "Task") -> Dict[str, Any]:
         """Creates a new Jira issue."""
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             fields = {
                 "project": {"key": project_key},
                 "summary": summary,
@@ -0,0 +1,108 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+logger = logging.getLogger("atlassian-mcp.metadata")
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "atlassian-mcp", "metadata.json")
+
+
+class MetadataCache:
+    """Disk-backed cache of slow-changing metadata (projects, issue types, fields, spaces).
+
+    The file is loaded at startup, so a new process can answer metadata lookups
+    without the network. A background task refreshes each kind once it is older
+    than `max_age` seconds and writes the result back to disk.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable[[], Awaitable[List[Dict[str, Any]]]]], site: str = "", path: Optional[str] = None, max_age: Optional[float] = None):
+        self.loaders = loaders
+        self.site = site
+        self.path = path or os.getenv("ATLASSIAN_METADATA_CACHE", DEFAULT_PATH)
+        self.max_age = max_age or float(os.getenv("ATLASSIAN_METADATA_MAX_AGE", "86400"))
+        # Refreshing on a cache miss is rate limited so unknown names don't cause a refetch every call.
+        self.min_refresh_interval = 60.0
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refresher: Optional[asyncio.Task] = None
+
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+            # A cache written for another Atlassian site is ignored (and overwritten on refresh).
+            if stored.get("site") == site:
+                self._data = {kind: entry for kind, entry in stored.get("kinds", {}).items() if kind in loaders}
+                logger.info(f"Loaded metadata cache from {self.path} ({', '.join(self._data) or 'empty'})")
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable metadata cache {self.path}: {e}")
+
+    def get(self, kind: str) -> Optional[List[Dict[str, Any]]]:
+        """Returns cached items without touching the network (None if never fetched)."""
+        entry = self._data.get(kind)
+        return entry["items"] if entry else None
+
+    def age(self, kind: str) -> Optional[float]:
+        entry = self._data.get(kind)
+        return time.time() - entry["fetched_at"] if entry else None
+
+    def is_stale(self, kind: str) -> bool:
+        age = self.age(kind)
+        return age is None or age > self.max_age
+
+    async def refresh(self, kind: str) -> List[Dict[str, Any]]:
+        lock = self._locks.setdefault(kind, asyncio.Lock())
+        async with lock:
+            items = await self.loaders[kind]()
+            self._data[kind] = {"fetched_at": time.time(), "items": items}
+            self._save()
+            logger.info(f"Refreshed metadata '{kind}' ({len(items)} items)")
+            return items
+
+    async def ensure(self, kind: str) -> List[Dict[str, Any]]:
+        """Returns cached items, fetching them first if the kind was never loaded."""
+        items = self.get(kind)
+        return items if items is not None else await self.refresh(kind)
+
+    async def refresh_if_old(self, kind: str) -> bool:
+        """Refreshes unless the data is younger than min_refresh_interval. Returns True if refreshed."""
+        age = self.age(kind)
+        if age is not None and age < self.min_refresh_interval:
+            return False
+        await self.refresh(kind)
+        return True
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"site": self.site, "kinds": self._data}, f)
+        os.replace(tmp_path, self.path)
+
+    def start(self) -> None:
+        """Starts the background refresher on the running event loop (idempotent)."""
+        if self._refresher and not self._refresher.done():
+            return
+        self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._refresher:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            for kind in self.loaders:
+                if self.is_stale(kind):
+                    try:
+                        await self.refresh(kind)
+                    except Exception as e:
+                        logger.warning(f"Background refresh of metadata '{kind}' failed: {e}")
+            # Kinds that failed to load have no age and are retried after a short pause.
+            next_due = min((self.max_age - age if age is not None else 0 for age in map(self.age, self.loaders)), default=self.max_age)
+            await asyncio.sleep(max(self.min_refresh_interval, next_due))
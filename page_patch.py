@@ -0,0 +1,69 @@
+import re
+import html
+from typing import Dict, Any, List, Tuple
+
+HEADING_PATTERN = re.compile(r"<h([1-6])\b[^>]*>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+def heading_text(markup: str) -> str:
+    text = html.unescape(TAG_PATTERN.sub("", markup))
+    return " ".join(text.split())
+
+
+def find_section(body: str, heading: str) -> Tuple[int, int]:
+    """Returns the (start, end) offsets of the content under a heading.
+
+    The section runs from the end of the heading tag to the next heading of the
+    same or a higher level, or to the end of the body.
+    """
+    wanted = " ".join(heading.split()).lower()
+    headings = list(HEADING_PATTERN.finditer(body))
+    matches = [m for m in headings if heading_text(m.group(2)).lower() == wanted]
+    if not matches:
+        raise ValueError(f"Heading not found: {heading!r}")
+    if len(matches) > 1:
+        raise ValueError(f"Heading is ambiguous ({len(matches)} matches): {heading!r}")
+
+    match = matches[0]
+    level = int(match.group(1))
+    end = len(body)
+    for following in headings:
+        if following.start() > match.start() and int(following.group(1)) <= level:
+            end = following.start()
+            break
+    return match.end(), end
+
+
+def apply_edit(body: str, edit: Dict[str, Any]) -> str:
+    op = edit.get("op")
+    if op == "replace_section":
+        start, end = find_section(body, edit["heading"])
+        return body[:start] + edit["content"] + body[end:]
+    if op == "append_to_section":
+        _, end = find_section(body, edit["heading"])
+        return body[:end] + edit["content"] + body[end:]
+    if op == "replace_text":
+        old = edit["old"]
+        occurrences = body.count(old)
+        if occurrences == 0:
+            raise ValueError(f"Text not found: {old[:80]!r}")
+        count = edit.get("count")
+        if count is None and occurrences > 1:
+            raise ValueError(f"Text occurs {occurrences} times; set count (-1 for all): {old[:80]!r}")
+        return body.replace(old, edit["new"], -1 if count is None else count)
+    if op == "append":
+        return body + edit["content"]
+    raise ValueError(f"Unknown edit op: {op!r}")
+
+
+def apply_edits(body: str, edits: List[Dict[str, Any]]) -> str:
+    """Applies anchored edits in order. Any failing edit aborts the whole patch."""
+    for index, edit in enumerate(edits):
+        try:
+            body = apply_edit(body, edit)
+        except KeyError as e:
+            raise ValueError(f"Edit {index} is missing {e}") from None
+        except ValueError as e:
+            raise ValueError(f"Edit {index}: {e}") from None
+    return body
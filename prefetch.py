@@ -0,0 +1,108 @@
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable
+
+logger = logging.getLogger("atlassian-mcp.prefetch")
+
+Key = Tuple[str, ...]
+
+
+class Prefetcher:
+    """Speculatively fetches likely follow-up reads and parks them in a short-lived cache.
+
+    Prefetch traffic is budgeted: at most `max_in_flight` prefetches run at once and
+    at most `per_minute` start per minute. Anything over budget is dropped, never
+    queued, so prefetching cannot delay real requests.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_in_flight: Optional[int] = None, per_minute: Optional[int] = None, max_entries: int = 256):
+        self.ttl = ttl or float(os.getenv("ATLASSIAN_PREFETCH_TTL", "30"))
+        self.max_in_flight = max_in_flight or int(os.getenv("ATLASSIAN_PREFETCH_MAX_IN_FLIGHT", "2"))
+        self.per_minute = per_minute or int(os.getenv("ATLASSIAN_PREFETCH_PER_MINUTE", "60"))
+        self.max_entries = max_entries
+
+        # key -> {"task", "created", "used"}
+        self._entries: "OrderedDict[Key, Dict[str, Any]]" = OrderedDict()
+        self._in_flight = 0
+        self._tokens = float(self.per_minute)
+        self._refilled_at = time.monotonic()
+        self._counters = {"scheduled": 0, "dropped_budget": 0, "hits": 0, "misses": 0, "wasted": 0, "failed": 0}
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(float(self.per_minute), self._tokens + (now - self._refilled_at) * self.per_minute / 60)
+        self._refilled_at = now
+        if self._tokens < 1 or self._in_flight >= self.max_in_flight:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if now - e["created"] > self.ttl]:
+            self._drop(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry and not entry["used"]:
+            self._counters["wasted"] += 1
+            if not entry["task"].done():
+                entry["task"].cancel()
+
+    def schedule(self, key: Key, fetch: Callable[[], Awaitable[Any]]) -> None:
+        """Starts a background fetch for `key` unless it is cached or over budget."""
+        self._expire()
+        if key in self._entries:
+            return
+        if not self._take_token():
+            self._counters["dropped_budget"] += 1
+            return
+
+        def finished(task: asyncio.Task) -> None:
+            self._in_flight -= 1
+            # Failures surface through get(); retrieving here avoids "exception never retrieved".
+            if not task.cancelled() and task.exception():
+                self._counters["failed"] += 1
+                logger.debug(f"Prefetch of {key} failed: {task.exception()}")
+
+        self._in_flight += 1
+        task = asyncio.create_task(fetch())
+        task.add_done_callback(finished)
+        self._entries[key] = {"task": task, "created": time.monotonic(), "used": False}
+        self._counters["scheduled"] += 1
+
+    async def get(self, key: Key, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the prefetched result for `key` (waiting if still in flight), else fetches."""
+        self._expire()
+        entry = self._entries.pop(key, None)
+        if entry:
+            entry["used"] = True
+            try:
+                result = await entry["task"]
+                self._counters["hits"] += 1
+                logger.debug(f"Prefetch hit for {key}")
+                return result
+            except Exception:
+                pass
+        self._counters["misses"] += 1
+        return await fetch()
+
+    def invalidate(self, *keys: Key) -> None:
+        for key in keys:
+            entry = self._entries.pop(key, None)
+            if entry and not entry["task"].done():
+                entry["task"].cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_ratio": round(self._counters["hits"] / lookups, 3) if lookups else None,
+            "cached": len(self._entries),
+            "in_flight": self._in_flight
+        }
@@ -0,0 +1,282 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+import contextvars
+import httpx
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, Deque
+
+logger = logging.getLogger("atlassian-mcp.resilience")
+
+# Path segments that identify a resource rather than an endpoint: numeric IDs and issue keys.
+ID_SEGMENT = re.compile(r"^(\d+|[A-Z][A-Z0-9_]+-\d+)$")
+FAILURE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+_bulk_transfer = contextvars.ContextVar("atlassian_bulk_transfer", default=False)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+
+@contextmanager
+def bulk_transfer():
+    """Marks requests made inside the block (and in tasks it starts) as bulk transfers.
+
+    Attachment downloads and export fetches can legitimately take longer than any
+    whole-request deadline. They are never hedged and get a per-operation timeout
+    (connect, each read, each write) instead of a total deadline.
+    """
+    token = _bulk_transfer.set(True)
+    try:
+        yield
+    finally:
+        _bulk_transfer.reset(token)
+
+
+def endpoint_key(request: httpx.Request) -> str:
+    """Groups requests by method and path template, e.g. "GET /rest/api/3/issue/{id}"."""
+    segments = request.url.path.split("/")
+    # The segment after "api" is the API version ("/rest/api/3"), not an ID.
+    segments = ["{id}" if ID_SEGMENT.match(segment) and previous != "api" else segment for previous, segment in zip([""] + segments, segments)]
+    return f"{request.method} {'/'.join(segments)}"
+
+
+class CircuitBreaker:
+    """Classic closed -> open -> half-open breaker for one endpoint."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record(self, success: bool) -> None:
+        self.trial_in_flight = False
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """Transport that adds tail-latency and failure control under the API clients.
+
+    - Hedging: an idempotent GET that has not answered within the endpoint's
+      observed p95 latency gets one duplicate request; the first answer wins.
+    - Circuit breaking: after `failure_threshold` consecutive failures (transport
+      errors, 429/5xx) an endpoint fails fast with CircuitOpenError for
+      `reset_timeout` seconds, then lets one trial request through. While open,
+      GETs can be answered from the last good response instead (`serve_stale`).
+    - Deadlines: every request (including its hedge) must finish within a
+      per-operation deadline, configurable per "METHOD /path/{id}" endpoint.
+      Requests inside `bulk_transfer()` are exempt from hedging and deadlines and
+      only time out when one network operation stalls for `transfer_timeout`.
+
+    One instance is shared by all httpx clients a JiraClient/ConfluenceClient
+    creates, so it also pools connections across calls; `aclose()` from those
+    short-lived clients is ignored, call `close()` to release it.
+    """
+
+    def __init__(self, inner: Optional[httpx.AsyncBaseTransport] = None, read_deadline: Optional[float] = None, write_deadline: Optional[float] = None, deadlines: Optional[Dict[str, float]] = None, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None, hedge: Optional[bool] = None, serve_stale: Optional[bool] = None, transfer_timeout: Optional[float] = None):
+        self.inner = inner or httpx.AsyncHTTPTransport()
+        self.read_deadline = read_deadline or float(os.getenv("ATLASSIAN_READ_DEADLINE", "10"))
+        self.write_deadline = write_deadline or float(os.getenv("ATLASSIAN_WRITE_DEADLINE", "30"))
+        self.deadlines = deadlines if deadlines is not None else json.loads(os.getenv("ATLASSIAN_DEADLINES", "{}"))
+        self.failure_threshold = failure_threshold or int(os.getenv("ATLASSIAN_BREAKER_THRESHOLD", "5"))
+        self.reset_timeout = reset_timeout or float(os.getenv("ATLASSIAN_BREAKER_RESET", "30"))
+        self.hedge = hedge if hedge is not None else os.getenv("ATLASSIAN_HEDGE", "1").lower() in ("1", "true", "yes")
+        self.serve_stale = serve_stale if serve_stale is not None else os.getenv("ATLASSIAN_SERVE_STALE", "").lower() in ("1", "true", "yes")
+        self.transfer_timeout = transfer_timeout or float(os.getenv("ATLASSIAN_TRANSFER_TIMEOUT", "30"))
+
+        self.min_samples = 20
+        self.min_hedge_delay = 0.05
+        # At most this fraction of GETs may be hedged, so a slow backend isn't doubly loaded.
+        self.max_hedge_ratio = 0.1
+        self.max_stale_bytes = 1_000_000
+        self.max_stale_entries = 256
+
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stale: "OrderedDict[str, httpx.Response]" = OrderedDict()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "short_circuited": 0, "served_stale": 0, "deadline_exceeded": 0}
+
+    def deadline_for(self, request: httpx.Request, key: str) -> float:
+        if key in self.deadlines:
+            return float(self.deadlines[key])
+        return self.read_deadline if request.method in ("GET", "HEAD") else self.write_deadline
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """p95 latency of the endpoint, or None until enough samples were seen."""
+        samples = self._latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return max(self.min_hedge_delay, ordered[int(0.95 * (len(ordered) - 1))])
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        if key not in self._breakers:
+            self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self._breakers[key]
+
+    async def _attempt(self, request: httpx.Request) -> httpx.Response:
+        response = await self.inner.handle_async_request(request)
+        try:
+            # Read the body here so hedging and deadlines cover the whole exchange.
+            await response.aread()
+        finally:
+            await response.aclose()
+        return response
+
+    async def _hedged(self, request: httpx.Request, key: str) -> httpx.Response:
+        delay = self.hedge_delay(key)
+        allowed = self.hedge and request.method == "GET" and delay is not None
+        if not allowed or self.stats["hedged"] >= self.max_hedge_ratio * self.stats["requests"]:
+            return await self._attempt(request)
+
+        primary = asyncio.create_task(self._attempt(request))
+        pending = {primary}
+        error: Optional[BaseException] = None
+        try:
+            # Cancellation (e.g. the deadline) also cancels whatever is still in flight.
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                pending = set()
+                return primary.result()
+
+            self.stats["hedged"] += 1
+            logger.debug(f"Hedging {key} after {delay:.3f}s")
+            backup = asyncio.create_task(self._attempt(request))
+            pending = {primary, backup}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _remember(self, request: httpx.Request, response: httpx.Response) -> None:
+        if request.method != "GET" or len(response.content) > self.max_stale_bytes:
+            return
+        url = str(request.url)
+        self._stale[url] = response
+        self._stale.move_to_end(url)
+        while len(self._stale) > self.max_stale_entries:
+            self._stale.popitem(last=False)
+
+    def _stale_response(self, request: httpx.Request) -> Optional[httpx.Response]:
+        cached = self._stale.get(str(request.url)) if self.serve_stale and request.method == "GET" else None
+        if cached is None:
+            return None
+        self.stats["served_stale"] += 1
+        # The stored content is already decoded.
+        headers = httpx.Headers({k: v for k, v in cached.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")})
+        headers["X-Served-Stale"] = "true"
+        return httpx.Response(cached.status_code, headers=headers, content=cached.content, request=request)
+
+    @staticmethod
+    async def _within_deadline(coro, deadline: float) -> httpx.Response:
+        # Not asyncio.wait_for: it can swallow a cancellation that arrives as the request
+        # completes, leaving the caller's cancelled task running.
+        task = asyncio.ensure_future(coro)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=deadline)
+        except BaseException:
+            task.cancel()
+            raise
+        if not done:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise asyncio.TimeoutError
+        return task.result()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key = endpoint_key(request)
+        breaker = self.breaker(key)
+        self.stats["requests"] += 1
+
+        if not breaker.allow():
+            self.stats["short_circuited"] += 1
+            stale = self._stale_response(request)
+            if stale is not None:
+                logger.warning(f"Circuit open for {key}, serving stale response")
+                return stale
+            raise CircuitOpenError(f"Circuit open for {key}; failing fast", request=request)
+
+        bulk = _bulk_transfer.get()
+        started = time.monotonic()
+        deadline = self.deadline_for(request, key)
+        try:
+            if bulk:
+                request.extensions["timeout"] = httpx.Timeout(self.transfer_timeout).as_dict()
+                response = await self._attempt(request)
+            else:
+                response = await self._within_deadline(self._hedged(request, key), deadline)
+        except asyncio.TimeoutError:
+            self.stats["deadline_exceeded"] += 1
+            breaker.record(False)
+            raise httpx.TimeoutException(f"Deadline of {deadline}s exceeded for {key}", request=request) from None
+        except httpx.TransportError:
+            breaker.record(False)
+            raise
+        except BaseException:
+            # Cancelled by the caller: no verdict on the endpoint.
+            breaker.trial_in_flight = False
+            raise
+
+        if response.status_code in FAILURE_STATUS_CODES:
+            breaker.record(False)
+        else:
+            breaker.record(True)
+            # Transfer times say nothing about the endpoint's usual latency.
+            if not bulk:
+                self._latencies.setdefault(key, deque(maxlen=200)).append(time.monotonic() - started)
+                if response.status_code < 300:
+                    self._remember(request, response)
+        return response
+
+    async def aclose(self) -> None:
+        # Shared across many short-lived clients; see close().
+        pass
+
+    async def close(self) -> None:
+        await self.inner.aclose()
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "open_circuits": [key for key, breaker in self._breakers.items() if breaker.state != "closed"],
+            "p95_seconds": {key: round(self.hedge_delay(key), 3) for key in self._latencies if self.hedge_delay(key) is not None}
+        }
@@ -1,9 +1,22 @@
 from mcp.server.fastmcp import FastMCP, Image
 from jira_client import JiraClient
 from confluence_client import ConfluenceClient
+from write_queue import WriteQueue
+import exporter
+import changelog
+import page_patch
+import aggregate
+import attachments
+from prefetch import Prefetcher
+from metadata_cache import MetadataCache
+from body_store import BodyStore
+import httpx
+import asyncio
 import json
+import os
 import logging
 import sys
+from contextlib import asynccontextmanager
 from typing import Any
 
 # Configure logging to stderr
@@ -14,7 +27,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger("atlassian-mcp")
 
-mcp = FastMCP("atlassian")
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # Resume draining writes journaled by a previous run before any tool is called.
+    if write_queue:
+        write_queue.start()
+    if metadata:
+        metadata.start()
+    try:
+        yield
+    finally:
+        if write_queue:
+            await write_queue.stop()
+        if metadata:
+            await metadata.stop()
+        body_store.close()
+        for client in (jira, confluence):
+            if client:
+                await client.transport.close()
+
+mcp = FastMCP("atlassian", lifespan=lifespan)
 
 # Initialize clients lazily or globally? Globally is fine if env vars are present.
 try:
@@ -31,6 +63,104 @@ except Exception as e:
     jira = None
     confluence = None
 
+# Opt-in write-behind queue: when a journal path is configured, comment and update
+# tools acknowledge with a tracking ID and the write is drained in the background.
+write_queue = None
+
+async def _queued_update_issue(issue_key: str, fields: dict):
+    if not await jira.update_issue(issue_key, fields):
+        return {"skipped": True, "reason": f"Issue {issue_key} already has this content"}
+    return True
+
+if os.getenv("ATLASSIAN_WRITE_QUEUE_DB") and jira and confluence:
+    try:
+        write_queue = WriteQueue({
+            "jira_add_comment": lambda issue_key, comment: jira.add_comment(issue_key, comment),
+            "jira_update_issue": _queued_update_issue,
+            "confluence_add_comment": lambda page_id, body, parent_comment_id=None: confluence.add_comment(page_id, body, parent_comment_id),
+        }, non_idempotent={"jira_add_comment", "confluence_add_comment"})
+        logger.info(f"Write queue enabled ({write_queue.db_path})")
+    except Exception as e:
+        logger.error(f"Error initializing write queue: {e}")
+        write_queue = None
+
+# Projects/issue types, fields and spaces, persisted across runs and refreshed in the background.
+metadata = None
+if jira and confluence:
+    metadata = MetadataCache({
+        "jira_projects": jira.get_projects,
+        "jira_fields": jira.get_fields,
+        "confluence_spaces": confluence.list_spaces,
+    }, site=f"{jira.base_url} {confluence.base_url}")
+
+def _find(items: list, key: str, value: str):
+    return next((item for item in items if (item.get(key) or "").lower() == value.lower()), None)
+
+async def _resolve_issue_type(project_key: str, issuetype: str) -> str:
+    """Validates a project key and issue type against cached metadata.
+
+    Returns the issue type's canonical name, or raises ValueError listing valid values.
+    A miss triggers at most one refresh, in case the project or type is new.
+    """
+    if not metadata:
+        return issuetype
+    def lookup(projects: list):
+        project = _find(projects, "key", project_key)
+        return project, project and _find(project["issue_types"], "name", issuetype)
+
+    try:
+        projects = await metadata.ensure("jira_projects")
+        project, found = lookup(projects)
+        if not found and await metadata.refresh_if_old("jira_projects"):
+            projects = metadata.get("jira_projects")
+            project, found = lookup(projects)
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not load project metadata, skipping validation: {e}")
+        return issuetype
+    if not project:
+        known = ", ".join(p["key"] for p in projects[:50])
+        raise ValueError(f"Unknown project key '{project_key}'. Known projects: {known}")
+    if not found:
+        names = ", ".join(t["name"] for t in project["issue_types"])
+        raise ValueError(f"Issue type '{issuetype}' is not available in {project['key']}. Valid types: {names}")
+    return found["name"]
+
+async def _resolve_field_ids(names: list) -> list:
+    """Maps field IDs or names (e.g. "Story Points") to field IDs using cached metadata.
+
+    Raises ValueError naming the fields that match nothing. A miss triggers at most
+    one refresh, in case the field is new.
+    """
+    if not metadata or not names:
+        return names
+    def lookup(fields: list) -> list:
+        return [_find(fields, "id", name) or _find(fields, "name", name) for name in names]
+    try:
+        matches = lookup(await metadata.ensure("jira_fields"))
+        if not all(matches) and await metadata.refresh_if_old("jira_fields"):
+            matches = lookup(metadata.get("jira_fields"))
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not load field metadata, passing field names through: {e}")
+        return names
+    unresolved = [name for name, match in zip(names, matches) if not match]
+    if unresolved:
+        raise ValueError(f"Unknown Jira field(s): {', '.join(unresolved)}. Use a field ID or name; atlassian_metadata(kind=\"jira_fields\") lists them")
+    return [match["id"] for match in matches]
+
+# Large page and issue bodies are retained (by ID and version) so later chunks are sliced locally.
+body_store = BodyStore()
+MAX_BODY_BYTES = int(os.getenv("ATLASSIAN_MAX_BODY_BYTES", "100000"))
+BUNDLE_DIR = os.getenv("ATLASSIAN_BUNDLE_DIR")
+
+# Opt-in speculative prefetch of the reads that usually follow an issue or page view.
+prefetcher = Prefetcher() if os.getenv("ATLASSIAN_PREFETCH", "").lower() in ("1", "true", "yes") else None
+
+async def _read(key: tuple, fetch):
+    """Serves a read from the prefetch cache when available, otherwise fetches it."""
+    if prefetcher:
+        return await prefetcher.get(key, fetch)
+    return await fetch()
+
 @mcp.tool()
 async def list_jira_issues(jql: str = "created is not empty order by created DESC", next_page_token: str = None, max_results: int = 50) -> str:
     """Lists Jira issues using JQL.
@@ -53,15 +183,22 @@ async def list_jira_issues(jql: str = "created is not empty order by created DES
         return f"Error: {e}"
 
 @mcp.tool()
-async def read_jira_issue(issue_key: str) -> str:
-    """Gets details of a specific Jira issue."""
-    logger.info(f"Tool called: read_jira_issue(issue_key='{issue_key}')")
+async def read_jira_issue(issue_key: str, description_offset: int = 0, description_length: int = None) -> str:
+    """Gets details of a specific Jira issue.
+    Very large descriptions (or any, when description_length is set) are returned in chunks:
+    the description then holds part of its JSON text, with a description_handle and
+    description_next_offset to continue with read_body_chunk.
+    """
+    logger.info(f"Tool called: read_jira_issue(issue_key='{issue_key}', description_offset={description_offset}, description_length={description_length})")
     if not jira:
         logger.error("Jira client not initialized")
         return "Jira client not initialized. Check configuration."
     try:
         issue = await jira.get_issue(issue_key)
         fields = issue.get("fields") or {}
+        if prefetcher:
+            prefetcher.schedule(("jira_comments", issue_key), lambda: jira.get_comments(issue_key))
+            prefetcher.schedule(("jira_transitions", issue_key), lambda: jira.get_transitions(issue_key))
         
         # Extract only essential fields to avoid truncation
         result = {
@@ -86,7 +223,16 @@ async def read_jira_issue(issue_key: str) -> str:
             ],
             "comment_count": (fields.get("comment") or {}).get("total", 0),
         }
-        
+
+        description = json.dumps(fields.get("description"), default=str)
+        if description_offset or description_length or len(description.encode()) > MAX_BODY_BYTES:
+            handle = body_store.put("issue", issue.get("key") or issue_key, fields.get("updated"), description)
+            chunk = body_store.read(handle, description_offset, description_length or MAX_BODY_BYTES)
+            result["description"] = chunk["text"]
+            result["description_handle"] = handle
+            result["description_next_offset"] = chunk["next_offset"]
+            result["description_total_bytes"] = chunk["total_bytes"]
+
         logger.info(f"Successfully read issue {issue_key}")
         return json.dumps(result, indent=2, default=str)
     except Exception as e:
@@ -94,15 +240,22 @@ async def read_jira_issue(issue_key: str) -> str:
         return f"Error: {e}"
 
 @mcp.tool()
-async def jira_add_comment(issue_key: str, comment: Any) -> str:
+async def jira_add_comment(issue_key: str, comment: Any, idempotency_key: str = None) -> str:
     """Adds a comment to a Jira issue. 
     Accepts a string (plain text) or a dictionary (Atlassian Document Format).
+    When the write queue is enabled, returns a tracking ID immediately (see write_queue_status).
+    Re-sending the same idempotency_key never queues the comment twice.
     """
     logger.info(f"Tool called: jira_add_comment(issue_key='{issue_key}')")
     if not jira:
         logger.error("Jira client not initialized")
         return "Jira client not initialized. Check configuration."
     try:
+        if prefetcher:
+            prefetcher.invalidate(("jira_comments", issue_key))
+        if write_queue:
+            tracking_id = write_queue.enqueue("jira_add_comment", {"issue_key": issue_key, "comment": comment}, idempotency_key)
+            return f"Comment queued. Tracking ID: {tracking_id}"
         result = await jira.add_comment(issue_key, comment)
         comment_id = result.get('id')
         logger.info(f"Comment added to {issue_key}, ID: {comment_id}")
@@ -121,6 +274,8 @@ async def jira_transition_issue(issue_key: str, transition_id: str) -> str:
         logger.error("Jira client not initialized")
         return "Jira client not initialized. Check configuration."
     try:
+        if prefetcher:
+            prefetcher.invalidate(("jira_transitions", issue_key))
         await jira.transition_issue(issue_key, transition_id)
         logger.info(f"Issue {issue_key} transitioned successfully")
         return f"Issue {issue_key} transitioned successfully."
@@ -136,7 +291,7 @@ async def jira_get_transitions(issue_key: str) -> str:
         logger.error("Jira client not initialized")
         return "Jira client not initialized. Check configuration."
     try:
-        transitions = await jira.get_transitions(issue_key)
+        transitions = await _read(("jira_transitions", issue_key), lambda: jira.get_transitions(issue_key))
         # Simplify output for LLM
         simple_transitions = [{"id": t["id"], "name": t["name"], "to": t["to"]["name"]} for t in transitions]
         logger.info(f"Found {len(transitions)} transitions for {issue_key}")
@@ -146,9 +301,10 @@ async def jira_get_transitions(issue_key: str) -> str:
         return f"Error: {e}"
 
 @mcp.tool()
-async def jira_update_issue(issue_key: str, summary: str = None, description: Any = None) -> str:
+async def jira_update_issue(issue_key: str, summary: str = None, description: Any = None, idempotency_key: str = None) -> str:
     """Updates the summary or description of a Jira issue.
     For description, accepts a string (plain text) or a dictionary (Atlassian Document Format).
+    When the write queue is enabled, returns a tracking ID immediately (see write_queue_status).
     """
     logger.info(f"Tool called: jira_update_issue(issue_key='{issue_key}', summary={'provided' if summary else 'None'}, description={'provided' if description else 'None'})")
     if not jira:
@@ -183,7 +339,11 @@ async def jira_update_issue(issue_key: str, summary: str = None, description: An
         return "No fields provided to update."
         
     try:
-        await jira.update_issue(issue_key, fields)
+        if write_queue:
+            tracking_id = write_queue.enqueue("jira_update_issue", {"issue_key": issue_key, "fields": fields}, idempotency_key)
+            return f"Update queued. Tracking ID: {tracking_id}"
+        if not await jira.update_issue(issue_key, fields):
+            return f"Issue {issue_key} already has this content; update skipped."
         logger.info(f"Issue {issue_key} updated")
         return f"Issue {issue_key} updated."
     except Exception as e:
@@ -200,6 +360,7 @@ async def jira_create_issue(project_key: str, summary: str, description: Any = N
         logger.error("Jira client not initialized")
         return "Jira client not initialized. Check configuration."
     try:
+        issuetype = await _resolve_issue_type(project_key, issuetype)
         result = await jira.create_issue(project_key, summary, description, issuetype)
         logger.info(f"Issue created: {result.get('key')}")
         return f"Issue created successfully. Key: {result.get('key')}, ID: {result.get('id')}"
@@ -215,12 +376,131 @@ async def jira_get_comments(issue_key: str) -> str:
         logger.error("Jira client not initialized")
         return "Jira client not initialized. Check configuration."
     try:
-        comments = await jira.get_comments(issue_key)
+        comments = await _read(("jira_comments", issue_key), lambda: jira.get_comments(issue_key))
         return json.dumps(comments, indent=2)
     except Exception as e:
         logger.error(f"Error getting comments for {issue_key}: {e}")
         return f"Error: {e}"
 
+async def _status_transitions(issue_key: str) -> list:
+    histories = [h async for h in jira.iter_changelog(issue_key)]
+    return changelog.compact_changelog(histories, ["status"]).get("status", [])
+
+@mcp.tool()
+async def jira_get_issue_history(issue_key: str, fields: list[str] = None) -> str:
+    """Gets the change history of a Jira issue as compact field-level transitions.
+    Includes a status timeline with hours spent in each status and assignee hand-offs.
+    Optionally restrict to specific fields, e.g. ["status", "assignee", "priority"].
+    """
+    logger.info(f"Tool called: jira_get_issue_history(issue_key='{issue_key}', fields={fields})")
+    if not jira:
+        logger.error("Jira client not initialized")
+        return "Jira client not initialized. Check configuration."
+    try:
+        async def collect() -> list:
+            return [h async for h in jira.iter_changelog(issue_key)]
+
+        issue, histories = await asyncio.gather(jira.get_issue(issue_key, fields=["created"]), collect())
+        created = (issue.get("fields") or {}).get("created")
+        transitions = changelog.compact_changelog(histories, fields)
+
+        result = {"key": issue_key, "created": created, "transitions": transitions}
+        if "status" in transitions:
+            periods = changelog.status_timeline(transitions["status"], created)
+            result["status_timeline"] = periods
+            result["time_in_status_hours"] = changelog.time_in_status(periods)
+        if "assignee" in transitions:
+            result["assignee_handoffs"] = [
+                {"at": t["at"], "from": t["from"] or "Unassigned", "to": t["to"] or "Unassigned"}
+                for t in transitions["assignee"]
+            ]
+        logger.info(f"Read {len(histories)} history entries for {issue_key}")
+        return json.dumps(result, indent=2, default=str)
+    except Exception as e:
+        logger.error(f"Error getting history for {issue_key}: {e}")
+        return f"Error: {e}"
+
+@mcp.tool()
+async def jira_cycle_time(jql: str, start_status: str = "In Progress", end_status: str = "Done", max_issues: int = 200, concurrency: int = 8) -> str:
+    """Computes cycle-time metrics (mean, median, p85, min, max in hours) for issues matching JQL.
+    Cycle time is measured from first entering start_status to next entering end_status.
+    Both accept comma-separated lists, e.g. end_status="Done,Closed".
+    Changelogs are fetched concurrently; only the summary is returned.
+    """
+    logger.info(f"Tool called: jira_cycle_time(jql='{jql}', start_status='{start_status}', end_status='{end_status}', max_issues={max_issues})")
+    if not jira:
+        logger.error("Jira client not initialized")
+        return "Jira client not initialized. Check configuration."
+    try:
+        start_statuses = [s.strip() for s in start_status.split(",") if s.strip()]
+        end_statuses = [s.strip() for s in end_status.split(",") if s.strip()]
+
+        keys = []
+        token = None
+        while len(keys) < max_issues:
+            page = await jira.list_issues(jql, token, min(100, max_issues - len(keys)))
+            keys.extend(issue["key"] for issue in page["issues"])
+            token = page.get("next_page_token")
+            if not token or not page["issues"]:
+                break
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def measure(key: str):
+            async with semaphore:
+                return changelog.cycle_time_hours(await _status_transitions(key), start_statuses, end_statuses)
+
+        hours_by_key = dict(zip(keys, await asyncio.gather(*(measure(key) for key in keys))))
+        completed = {key: hours for key, hours in hours_by_key.items() if hours is not None}
+        result = {
+            "issues_scanned": len(keys),
+            "issues_incomplete": len(keys) - len(completed),
+            "cycle_time": changelog.summarize_durations(list(completed.values())),
+            "slowest": sorted(completed.items(), key=lambda item: item[1], reverse=True)[:5]
+        }
+        logger.info(f"Computed cycle time for {len(completed)} of {len(keys)} issues")
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error computing cycle time: {e}")
+        return f"Error: {e}"
+
+@mcp.tool()
+async def jira_aggregate(jql: str, group_by: list[str] = None, sum_fields: list[str] = None, age_histogram: bool = False, max_issues: int = 20000, top: int = 50) -> str:
+    """Counts Jira issues matching JQL grouped by one or more fields, without listing them.
+    group_by: field IDs or names such as ["assignee"], ["status", "priority"], ["labels"] (default ["status"]).
+        Multi-valued fields (labels, components) count an issue once per value.
+    sum_fields: numeric fields to total per group, e.g. ["Story Points"], ["customfield_10016", "timespent"].
+    age_histogram: also bucket each group's issues by age since creation.
+    Returns only the summary table (largest groups first, at most `top` rows).
+    """
+    logger.info(f"Tool called: jira_aggregate(jql='{jql}', group_by={group_by}, sum_fields={sum_fields}, age_histogram={age_histogram})")
+    if not jira:
+        logger.error("Jira client not initialized")
+        return "Jira client not initialized. Check configuration."
+    try:
+        group_by = await _resolve_field_ids(group_by or ["status"])
+        sum_fields = await _resolve_field_ids(sum_fields or [])
+        aggregator = aggregate.Aggregator(group_by, sum_fields, "created" if age_histogram else None)
+        fields = list(dict.fromkeys(group_by + (sum_fields or []) + (["created"] if age_histogram else [])))
+        truncated = False
+        issues = jira.iter_issues(jql, fields)
+        try:
+            async for issue in issues:
+                if aggregator.issues >= max_issues:
+                    truncated = True
+                    break
+                aggregator.add(issue)
+        finally:
+            # Closes the search's HTTP client now, not whenever the generator is collected.
+            await issues.aclose()
+        result = aggregator.result(top)
+        result["truncated"] = truncated
+        logger.info(f"Aggregated {aggregator.issues} issues into {len(aggregator.groups)} groups")
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error aggregating issues: {e}")
+        return f"Error: {e}"
+
 @mcp.tool()
 async def jira_get_attachment_image(attachment_id: str) -> Image:
     """Gets an image attachment from Jira by its ID and returns it as an Image."""
@@ -238,6 +518,54 @@ async def jira_get_attachment_image(attachment_id: str) -> Image:
         logger.error(f"Error getting attachment {attachment_id}: {e}")
         return f"Error: {e}"
 
+async def _batch_attachments(source: str, listed: list, download, mime_type: str, max_file_bytes: int, max_total_bytes: int, bundle_name: str) -> list:
+    """Selects, downloads and packages attachments for the batch attachment tools."""
+    # Resolve the bundle first so a bad name fails before anything is downloaded.
+    path = attachments.bundle_path(BUNDLE_DIR, bundle_name) if bundle_name else None
+    selected, skipped = attachments.select_attachments(listed, mime_type, max_file_bytes, max_total_bytes)
+    if not path:
+        # Only images can be returned inline; anything else needs a bundle.
+        skipped += [{**a, "reason": "not an image; set bundle_name"} for a in selected if not (a.get("mime_type") or "").startswith("image/")]
+        selected = [a for a in selected if (a.get("mime_type") or "").startswith("image/")]
+
+    files, failed = await download(selected)
+    skipped += failed
+    logger.info(f"Downloaded {len(files)} of {len(listed)} attachments for {source}")
+    summary = {
+        "source": source,
+        "attachments_listed": len(listed),
+        "downloaded": [{"filename": a["filename"], "mime_type": a["mime_type"], "bytes": len(content)} for a, content in files],
+        "skipped": [{"filename": a["filename"], "size": a.get("size"), "reason": a["reason"]} for a in skipped]
+    }
+    if path:
+        summary["bundle_path"] = path
+        summary["bundle_bytes"] = attachments.write_bundle(path, files)
+        return [json.dumps(summary, indent=2)]
+    return [json.dumps(summary, indent=2)] + [
+        Image(data=content, format=a["mime_type"].split("/", 1)[1]) for a, content in files
+    ]
+
+@mcp.tool()
+async def jira_get_issue_attachments(issue_key: str, mime_type: str = "image/", max_file_bytes: int = 5000000, max_total_bytes: int = 20000000, bundle_name: str = None, concurrency: int = 4) -> list:
+    """Downloads all attachments of a Jira issue in one call.
+    Attachments are filtered by MIME type prefix (default "image/", "" for all) and size,
+    and downloaded concurrently until max_total_bytes is reached.
+    Images are returned inline after a JSON summary. With bundle_name, all selected files
+    (any type) are written instead to a new zip of that name in the server's
+    ATLASSIAN_BUNDLE_DIR; an existing file is never overwritten.
+    """
+    logger.info(f"Tool called: jira_get_issue_attachments(issue_key='{issue_key}', mime_type='{mime_type}', bundle_name={bundle_name})")
+    if not jira:
+        logger.error("Jira client not initialized")
+        return ["Jira client not initialized. Check configuration."]
+    try:
+        listed = await jira.list_attachments(issue_key)
+        download = lambda selected: jira.download_attachments(selected, concurrency)
+        return await _batch_attachments(issue_key, listed, download, mime_type, max_file_bytes, max_total_bytes, bundle_name)
+    except Exception as e:
+        logger.error(f"Error getting attachments for {issue_key}: {e}")
+        return [f"Error: {e}"]
+
 @mcp.tool()
 async def list_confluence_pages(space_key: str = None, limit: int = 25) -> str:
     """Lists Confluence pages in a space."""
@@ -254,20 +582,61 @@ async def list_confluence_pages(space_key: str = None, limit: int = 25) -> str:
         return f"Error: {e}"
 
 @mcp.tool()
-async def view_confluence_page(page_id: str) -> str:
-    """Gets the content of a Confluence page."""
-    logger.info(f"Tool called: view_confluence_page(page_id='{page_id}')")
+async def view_confluence_page(page_id: str, offset: int = 0, length: int = None) -> str:
+    """Gets the content of a Confluence page.
+    Very large pages (or any, when length is set) are returned in chunks of the body:
+    the result then includes body_handle, next_offset, total_bytes and, for the first
+    chunk, the page's section headings. Continue with read_body_chunk.
+    """
+    logger.info(f"Tool called: view_confluence_page(page_id='{page_id}', offset={offset}, length={length})")
     if not confluence:
         logger.error("Confluence client not initialized")
         return "Confluence client not initialized. Check configuration."
     try:
-        page = await confluence.get_page(page_id)
+        page = await confluence.get_page_cached(page_id)
+        if prefetcher:
+            prefetcher.schedule(("confluence_comments", page_id), lambda: confluence.get_comments(page_id))
         logger.info(f"Successfully retrieved page {page_id}")
-        return str(page)
+        if not offset and not length and len(page["body"].encode()) <= MAX_BODY_BYTES:
+            return str(page)
+
+        handle = body_store.put("page", page["id"], page["version"], page["body"], with_sections=True)
+        chunk = body_store.read(handle, offset, length or MAX_BODY_BYTES)
+        result = {
+            "id": page["id"],
+            "title": page["title"],
+            "version": page["version"],
+            "body": chunk["text"],
+            "body_handle": handle,
+            "offset": chunk["offset"],
+            "next_offset": chunk["next_offset"],
+            "total_bytes": chunk["total_bytes"]
+        }
+        if not offset:
+            result["sections"] = [s["heading"] for s in body_store.sections(handle)]
+        return str(result)
     except Exception as e:
         logger.error(f"Error viewing page {page_id}: {e}")
         return f"Error: {e}"
 
+@mcp.tool()
+async def read_body_chunk(handle: str, offset: int = 0, length: int = None, section: str = None) -> str:
+    """Reads part of a page or issue body retained by view_confluence_page or read_jira_issue,
+    without fetching it from Atlassian again.
+    offset/length are in bytes (length defaults to the server's chunk size). With section
+    (a heading of a Confluence page), offset/length apply within that section only.
+    Follow next_offset until it is null to read everything.
+    """
+    logger.info(f"Tool called: read_body_chunk(handle='{handle}', offset={offset}, length={length}, section={section})")
+    try:
+        chunk = body_store.read(handle, offset, length or MAX_BODY_BYTES, section)
+        return str(chunk)
+    except KeyError:
+        return f"Error: Body {handle} is no longer retained. Read the page or issue again to get a new handle."
+    except Exception as e:
+        logger.error(f"Error reading body chunk {handle}: {e}")
+        return f"Error: {e}"
+
 @mcp.tool()
 async def edit_confluence_page(page_id: str, title: str, content: str, version: int = None) -> str:
     """Updates a Confluence page.
@@ -295,12 +664,43 @@ async def edit_confluence_page(page_id: str, title: str, content: str, version:
         return "Confluence client not initialized. Check configuration."
     try:
         result = await confluence.update_page(page_id, title, content, version)
+        if result.get("skipped"):
+            return f"Page {page_id} already has this content; update skipped (version {result['version']['number']})."
         logger.info(f"Page {page_id} updated successfully")
         return str(result)
     except Exception as e:
         logger.error(f"Error updating page {page_id}: {e}")
         return f"Error: {e}"
 
+@mcp.tool()
+async def patch_confluence_page(page_id: str, edits: list[dict], title: str = None) -> str:
+    """Edits part of a Confluence page without resending the whole body.
+    Edits are applied in order to the current storage-format body; if any edit fails, nothing is saved.
+    Supported edits:
+      {"op": "replace_section", "heading": "Heading text", "content": "<p>...</p>"}
+          Replaces everything under the heading up to the next heading of the same or higher level.
+      {"op": "append_to_section", "heading": "Heading text", "content": "<p>...</p>"}
+      {"op": "replace_text", "old": "...", "new": "...", "count": 1}
+          count is required if the text occurs more than once (-1 replaces all).
+      {"op": "append", "content": "<p>...</p>"}
+    """
+    logger.info(f"Tool called: patch_confluence_page(page_id='{page_id}', edits={len(edits)})")
+    if not confluence:
+        logger.error("Confluence client not initialized")
+        return "Confluence client not initialized. Check configuration."
+    try:
+        page = await confluence.get_page_cached(page_id)
+        new_body = page_patch.apply_edits(page["body"], edits)
+        result = await confluence.update_page(page_id, title or page["title"], new_body, page["version"] + 1)
+        if result.get("skipped"):
+            return f"Page {page_id} unchanged by these edits; update skipped (version {page['version']})."
+        new_version = (result.get("version") or {}).get("number", page["version"] + 1)
+        logger.info(f"Page {page_id} patched to version {new_version}")
+        return f"Page {page_id} patched ({len(edits)} edits). Version: {new_version}, body size: {len(page['body'])} -> {len(new_body)} chars."
+    except Exception as e:
+        logger.error(f"Error patching page {page_id}: {e}")
+        return f"Error: {e}"
+
 @mcp.tool()
 async def confluence_create_page(title: str, content: str, parent_id: str = None, space_key: str = None) -> str:
     """Creates a new Confluence page, optionally under a parent page."""
@@ -348,6 +748,76 @@ async def confluence_search(cql: str, limit: int = 25) -> str:
         logger.error(f"Error searching Confluence: {e}")
         return f"Error: {e}"
 
+@mcp.tool()
+async def confluence_get_page_tree(page_id: str, include_content: bool = False, max_depth: int = 3, max_pages: int = 200, max_bytes: int = 100000) -> str:
+    """Gets a Confluence page and its descendants in one call.
+    By default returns a compact indented outline (title, ID, version) of the subtree.
+    With include_content=True, returns the pages' storage-format bodies concatenated instead.
+    Either way the crawl stops once max_bytes of output has been produced; a root page
+    whose body alone exceeds the budget is returned cut off at max_bytes.
+    """
+    logger.info(f"Tool called: confluence_get_page_tree(page_id='{page_id}', include_content={include_content}, max_depth={max_depth}, max_pages={max_pages})")
+    if not confluence:
+        logger.error("Confluence client not initialized")
+        return "Confluence client not initialized. Check configuration."
+    try:
+        nodes = []
+        sections = []
+        used = 0
+        truncated = False
+
+        def outline_line(node: dict) -> str:
+            return f"{'  ' * node['depth']}- {node['title']} (ID: {node['id']}, v{node['version']})"
+
+        crawl = confluence.crawl_page_tree(page_id, max_depth=max_depth, max_pages=max_pages, include_body=include_content)
+        try:
+            async for node in crawl:
+                if include_content:
+                    section = f"# {node['title']} (ID: {node['id']}, version {node['version']})\n\n{node['body']}\n"
+                else:
+                    section = outline_line(node)
+                size = len(section.encode()) + 1
+                if used + size > max_bytes:
+                    truncated = True
+                    if include_content and not sections:
+                        # The root alone is over budget: return as much of it as fits.
+                        sections.append(section.encode()[:max_bytes].decode(errors="ignore"))
+                    break
+                used += size
+                if include_content:
+                    sections.append(section)
+                else:
+                    nodes.append(node)
+        finally:
+            await crawl.aclose()
+
+        if include_content:
+            logger.info(f"Returned content of {len(sections)} pages under {page_id}")
+            if truncated:
+                sections.append(f"[Truncated: byte budget of {max_bytes} reached after {len(sections)} pages]")
+            return "\n".join(sections)
+
+        children: dict = {}
+        for node in nodes:
+            children.setdefault(node["parent_id"], []).append(node)
+        lines = []
+
+        def render(parent_id: str) -> None:
+            for node in children.get(parent_id, []):
+                lines.append(outline_line(node))
+                render(node["id"])
+
+        render(None)
+        if truncated:
+            lines.append(f"[Truncated: byte budget of {max_bytes} reached after {len(nodes)} pages]")
+        elif len(nodes) >= max_pages:
+            lines.append(f"[Stopped after max_pages={max_pages}]")
+        logger.info(f"Found {len(nodes)} pages under {page_id}")
+        return "\n".join(lines)
+    except Exception as e:
+        logger.error(f"Error crawling page tree {page_id}: {e}")
+        return f"Error: {e}"
+
 @mcp.tool()
 async def confluence_get_comments(page_id: str) -> str:
     """Gets all comments for a Confluence page."""
@@ -356,22 +826,29 @@ async def confluence_get_comments(page_id: str) -> str:
         logger.error("Confluence client not initialized")
         return "Confluence client not initialized. Check configuration."
     try:
-        comments = await confluence.get_comments(page_id)
+        comments = await _read(("confluence_comments", page_id), lambda: confluence.get_comments(page_id))
         return json.dumps(comments, indent=2)
     except Exception as e:
         logger.error(f"Error getting comments for page {page_id}: {e}")
         return f"Error: {e}"
 
 @mcp.tool()
-async def confluence_add_comment(page_id: str, body: str, parent_comment_id: str = None) -> str:
+async def confluence_add_comment(page_id: str, body: str, parent_comment_id: str = None, idempotency_key: str = None) -> str:
     """Adds a comment to a Confluence page. 
     Set parent_comment_id to reply to an existing comment.
+    When the write queue is enabled, returns a tracking ID immediately (see write_queue_status).
     """
     logger.info(f"Tool called: confluence_add_comment(page_id='{page_id}', parent_comment_id={parent_comment_id})")
     if not confluence:
         logger.error("Confluence client not initialized")
         return "Confluence client not initialized. Check configuration."
     try:
+        if prefetcher:
+            prefetcher.invalidate(("confluence_comments", page_id))
+        if write_queue:
+            payload = {"page_id": page_id, "body": body, "parent_comment_id": parent_comment_id}
+            tracking_id = write_queue.enqueue("confluence_add_comment", payload, idempotency_key)
+            return f"Comment queued. Tracking ID: {tracking_id}"
         result = await confluence.add_comment(page_id, body, parent_comment_id)
         comment_id = result.get('id')
         logger.info(f"Comment added: {comment_id}")
@@ -397,5 +874,130 @@ async def confluence_get_attachment_image(page_id: str, filename: str) -> Image:
         logger.error(f"Error getting attachment {filename} from page {page_id}: {e}")
         return f"Error: {e}"
 
+@mcp.tool()
+async def confluence_get_page_attachments(page_id: str, mime_type: str = "image/", max_file_bytes: int = 5000000, max_total_bytes: int = 20000000, bundle_name: str = None, concurrency: int = 4) -> list:
+    """Downloads all attachments of a Confluence page in one call.
+    Attachments are filtered by MIME type prefix (default "image/", "" for all) and size,
+    and downloaded concurrently until max_total_bytes is reached.
+    Images are returned inline after a JSON summary. With bundle_name, all selected files
+    (any type) are written instead to a new zip of that name in the server's
+    ATLASSIAN_BUNDLE_DIR; an existing file is never overwritten.
+    """
+    logger.info(f"Tool called: confluence_get_page_attachments(page_id='{page_id}', mime_type='{mime_type}', bundle_name={bundle_name})")
+    if not confluence:
+        logger.error("Confluence client not initialized")
+        return ["Confluence client not initialized. Check configuration."]
+    try:
+        listed = list((await confluence.get_attachment_index(page_id)).values())
+        download = lambda selected: confluence.download_attachments(selected, concurrency)
+        return await _batch_attachments(page_id, listed, download, mime_type, max_file_bytes, max_total_bytes, bundle_name)
+    except Exception as e:
+        logger.error(f"Error getting attachments for page {page_id}: {e}")
+        return [f"Error: {e}"]
+
+@mcp.tool()
+async def export_confluence_space(output_path: str, space_key: str = None, compression: str = "gzip", concurrency: int = 8) -> str:
+    """Exports every page of a Confluence space to a compressed JSONL file on the server.
+    compression is "gzip" or "zstd" (requires the zstandard package).
+    Progress is checkpointed next to the file; re-running the same export after an
+    interruption resumes where it stopped. Returns a summary, not the content.
+    """
+    logger.info(f"Tool called: export_confluence_space(space_key={space_key}, output_path='{output_path}', compression={compression})")
+    if not confluence:
+        logger.error("Confluence client not initialized")
+        return "Confluence client not initialized. Check configuration."
+    try:
+        space = space_key or confluence.default_space
+        if not space:
+            return "Error: No space key provided and no default configured."
+        result = await exporter.export_confluence_space(confluence, space, output_path, concurrency, compression)
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error exporting space {space_key}: {e}")
+        return f"Error: {e}"
+
+@mcp.tool()
+async def export_jira_project(project_key: str, output_path: str, compression: str = "gzip", concurrency: int = 8) -> str:
+    """Exports every issue of a Jira project to a compressed JSONL file on the server.
+    compression is "gzip" or "zstd" (requires the zstandard package).
+    Progress is checkpointed next to the file; re-running the same export after an
+    interruption resumes where it stopped. Returns a summary, not the content.
+    """
+    logger.info(f"Tool called: export_jira_project(project_key='{project_key}', output_path='{output_path}', compression={compression})")
+    if not jira:
+        logger.error("Jira client not initialized")
+        return "Jira client not initialized. Check configuration."
+    try:
+        result = await exporter.export_jira_project(jira, project_key, output_path, concurrency, compression)
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error exporting project {project_key}: {e}")
+        return f"Error: {e}"
+
+@mcp.tool()
+async def atlassian_metadata(kind: str = "jira_projects", refresh: bool = False) -> str:
+    """Lists cached Atlassian metadata, answered locally when possible.
+    kind is one of:
+      jira_projects     - project keys and names with their issue types
+      jira_fields       - field IDs and names (including custom fields)
+      confluence_spaces - space keys and names
+    Set refresh=True to re-fetch from Atlassian first.
+    """
+    logger.info(f"Tool called: atlassian_metadata(kind='{kind}', refresh={refresh})")
+    if not metadata:
+        return "Atlassian clients not initialized. Check configuration."
+    if kind not in metadata.loaders:
+        return f"Error: Unknown kind '{kind}'. Use one of: {', '.join(metadata.loaders)}."
+    try:
+        items = await (metadata.refresh(kind) if refresh else metadata.ensure(kind))
+        if kind == "jira_projects":
+            items = [{"key": p["key"], "name": p["name"], "issue_types": [t["name"] for t in p["issue_types"]]} for p in items]
+        age = metadata.age(kind)
+        return json.dumps({"kind": kind, "age_seconds": round(age) if age is not None else None, "items": items}, indent=2)
+    except Exception as e:
+        logger.error(f"Error getting metadata '{kind}': {e}")
+        return f"Error: {e}"
+
+@mcp.tool()
+async def prefetch_stats() -> str:
+    """Reports how well speculative prefetching is paying off: hits, misses, hit ratio,
+    prefetches dropped for budget and prefetched results that expired unused."""
+    logger.info("Tool called: prefetch_stats()")
+    if not prefetcher:
+        return "Prefetching is not enabled. Set ATLASSIAN_PREFETCH=1 to turn it on."
+    return json.dumps(prefetcher.stats(), indent=2)
+
+@mcp.tool()
+async def resilience_stats() -> str:
+    """Reports the resilience layer under each client: hedged requests and how often the
+    hedge won, short-circuited and stale-served calls, exceeded deadlines, endpoints whose
+    circuit breaker is not closed and observed p95 latency per endpoint."""
+    logger.info("Tool called: resilience_stats()")
+    if not jira or not confluence:
+        return "Error: Atlassian clients not initialized. Check server logs."
+    return json.dumps({"jira": jira.transport.report(), "confluence": confluence.transport.report()}, indent=2)
+
+@mcp.tool()
+async def write_queue_status(tracking_id: str = None) -> str:
+    """Reports on queued writes.
+    With a tracking_id, returns that write's status: pending, running, done, skipped (the
+    issue already had this content, so nothing was written), failed, or unknown when a
+    comment's request timed out and it was not re-sent to avoid a duplicate.
+    Without one, returns counts per status and the most recent failures.
+    """
+    logger.info(f"Tool called: write_queue_status(tracking_id={tracking_id})")
+    if not write_queue:
+        return "Write queue is not enabled. Set ATLASSIAN_WRITE_QUEUE_DB to turn it on."
+    try:
+        if tracking_id:
+            status = write_queue.status(tracking_id)
+            if not status:
+                return f"Error: No queued write with tracking ID {tracking_id}."
+            return json.dumps(status, indent=2)
+        return json.dumps(write_queue.summary(), indent=2)
+    except Exception as e:
+        logger.error(f"Error reading write queue status: {e}")
+        return f"Error: {e}"
+
 if __name__ == "__main__":
     mcp.run()
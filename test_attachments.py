@@ -0,0 +1,51 @@
+"""Checks that attachment bundles stay inside the bundle directory and never overwrite files.
+
+Run with pytest, or directly: python test_attachments.py
+"""
+import os
+import tempfile
+import zipfile
+
+import attachments
+
+
+def rejects(directory, name):
+    try:
+        attachments.bundle_path(directory, name)
+    except ValueError:
+        return True
+    return False
+
+
+def test_bundles_disabled_without_directory():
+    assert rejects(None, "files.zip")
+
+
+def test_bundle_name_cannot_leave_directory():
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("../files.zip", "/etc/files.zip", "sub/files.zip", "..\\files.zip", "..", ""):
+            assert rejects(tmp, name), name
+        assert attachments.bundle_path(tmp, "files") == os.path.join(tmp, "files.zip")
+
+
+def test_existing_bundle_is_not_overwritten():
+    files = [({"id": "1", "filename": "a.txt"}, b"first"), ({"id": "2", "filename": "a.txt"}, b"second")]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = attachments.bundle_path(tmp, "files.zip")
+        assert attachments.write_bundle(path, files) == len(b"first") + len(b"second")
+        with zipfile.ZipFile(path) as bundle:
+            assert sorted(bundle.namelist()) == ["2_a.txt", "a.txt"]
+        assert rejects(tmp, "files.zip")
+        try:
+            attachments.write_bundle(path, files)
+            overwritten = True
+        except FileExistsError:
+            overwritten = False
+        assert not overwritten
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,81 @@
+"""Checks chunked reads of retained bodies, in memory and spilled to disk.
+
+Run with pytest, or directly: python test_body_store.py
+"""
+from body_store import BodyStore
+
+BODY = (
+    "<h1>Überblick</h1><p>intro é</p>"
+    "<h2>Details</h2><p>naïve ☃ text</p><h3>Deeper</h3><p>more 😀</p>"
+    "<h2>Next</h2><p>tail</p>"
+)
+DETAILS = "<p>naïve ☃ text</p><h3>Deeper</h3><p>more 😀</p>"
+
+
+def read_all(store, handle, length, section=None):
+    chunks, offset = [], 0
+    while offset is not None:
+        chunk = store.read(handle, offset, length, section)
+        assert chunk["offset"] == offset
+        chunks.append(chunk["text"])
+        offset = chunk["next_offset"]
+    return "".join(chunks)
+
+
+def check_store(store):
+    handle = store.put("page", "1", 3, BODY, with_sections=True)
+    # Chunk boundaries fall inside multi-byte characters; they must snap, not split.
+    assert read_all(store, handle, 5) == BODY
+    assert read_all(store, handle, 3, "details") == DETAILS
+
+    first = store.read(handle, 0, None, "Details")
+    assert first["text"] == DETAILS
+    assert first["total_bytes"] == len(DETAILS.encode())
+    assert first["next_offset"] is None
+
+    # Offsets are relative to the section, not to the whole body.
+    skip = len("<p>naïve ".encode())
+    assert store.read(handle, skip, 3, "Details")["text"] == "☃"
+    # A top-level section contains every deeper heading after it.
+    assert store.read(handle, 0, None, "Überblick")["text"] == BODY[len("<h1>Überblick</h1>"):]
+    assert store.read(handle, 0, None, "Deeper")["text"] == "<p>more 😀</p>"
+    try:
+        store.read(handle, 0, 10, "Missing")
+        found = True
+    except ValueError:
+        found = False
+    assert not found
+    store.close()
+
+
+def test_section_reads_in_memory():
+    check_store(BodyStore(spill_threshold=10_000_000))
+
+
+def test_section_reads_spilled():
+    store = BodyStore(spill_threshold=16)
+    handle = store.put("page", "1", 3, BODY)
+    assert "file" in store._entries[handle]
+    store.close()
+    check_store(BodyStore(spill_threshold=16))
+
+
+def test_new_version_replaces_old():
+    store = BodyStore(max_entries=4)
+    old = store.put("page", "1", 1, "old")
+    new = store.put("page", "1", 2, "new")
+    assert not store.has(old) and store.has(new)
+    try:
+        store.read(old)
+        evicted = False
+    except KeyError:
+        evicted = True
+    assert evicted
+    store.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,110 @@
+"""Exercises no-op write detection: body normalization and the Jira update check.
+
+Run with pytest, or directly: python test_content_hash.py
+"""
+import os
+import json
+import asyncio
+
+import httpx
+from resilience import ResilientTransport
+from content_hash import content_hash, HashRegistry
+
+
+class FakeJiraServer:
+    """Holds one issue and records every request made to it."""
+
+    def __init__(self):
+        self.fields = {"summary": "Hello", "updated": "2026-01-01T00:00:00.000+0000"}
+        self.requests = []
+        self.edits = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.params.get("fields")))
+        if request.method == "PUT":
+            self.fields.update(json.loads(request.content)["fields"])
+            self.touch()
+            return httpx.Response(204)
+        return httpx.Response(200, json={"key": "P-1", "fields": dict(self.fields)})
+
+    def touch(self):
+        self.edits += 1
+        self.fields["updated"] = f"2026-01-01T00:00:{self.edits:02d}.000+0000"
+
+
+def make_jira(server: FakeJiraServer):
+    os.environ.update({"JIRA_URL": "http://jira.test/rest/api/3", "ATLASSIAN_USERNAME": "user", "ATLASSIAN_API_KEY": "key"})
+    from jira_client import JiraClient
+    jira = JiraClient()
+    jira.transport = ResilientTransport(inner=httpx.MockTransport(server.handle), hedge=False, serve_stale=False, deadlines={})
+    return jira
+
+
+def test_changed_update_costs_no_extra_read():
+    server = FakeJiraServer()
+    jira = make_jira(server)
+
+    async def run():
+        await jira.get_issue("P-1")
+        server.requests.clear()
+        return await jira.update_issue("P-1", {"summary": "Hello2"})
+
+    assert asyncio.run(run()) is True
+    assert server.requests == [("PUT", None)]
+
+
+def test_unchanged_update_is_skipped_after_checking_updated():
+    server = FakeJiraServer()
+    jira = make_jira(server)
+
+    async def run():
+        await jira.get_issue("P-1")
+        server.requests.clear()
+        return await jira.update_issue("P-1", {"summary": "Hello"})
+
+    assert asyncio.run(run()) is False
+    assert server.requests == [("GET", "updated")]
+
+
+def test_update_not_skipped_after_edit_elsewhere():
+    server = FakeJiraServer()
+    jira = make_jira(server)
+
+    async def run():
+        await jira.get_issue("P-1")
+        # Someone changes the summary in the UI, then the agent writes the old value back.
+        server.fields["summary"] = "Changed in UI"
+        server.touch()
+        return await jira.update_issue("P-1", {"summary": "Hello"})
+
+    assert asyncio.run(run()) is True
+    assert server.fields["summary"] == "Hello"
+
+
+def test_formatting_between_blocks_is_ignored():
+    stored = "<p>One</p><ul><li>a</li><li>b</li></ul>"
+    edited = "\r\n  <p>One</p>\n<ul>\n  <li>a</li>\n  <li>b</li>\n</ul>\n"
+    assert content_hash(stored) == content_hash(edited)
+
+
+def test_whitespace_between_inline_tags_and_in_text_is_kept():
+    assert content_hash("<p><strong>a</strong> <em>b</em></p>") != content_hash("<p><strong>a</strong><em>b</em></p>")
+    assert content_hash("<p>a b</p>") != content_hash("<p>a  b</p>")
+    # Only whitespace with a block-level tag on both sides is formatting.
+    assert content_hash("<p>x</p> <span>y</span>") != content_hash("<p>x</p><span>y</span>")
+
+
+def test_structured_values_ignore_key_order_and_tags_must_match():
+    assert content_hash({"type": "doc", "version": 1}) == content_hash({"version": 1, "type": "doc"})
+    registry = HashRegistry()
+    registry.record(("page", "1"), ("Title", "<p>a</p>"), tag=3)
+    assert registry.matches(("page", "1"), ("Title", "<p>a</p>\n"), tag=3)
+    assert not registry.matches(("page", "1"), ("Title", "<p>a</p>"), tag=4)
+    assert not registry.matches(("page", "1"), ("Other", "<p>a</p>"), tag=3)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
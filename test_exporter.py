@@ -0,0 +1,127 @@
+"""Exercises the resumable exporter with fake listing and fetch callables.
+
+Run with pytest, or directly: python test_exporter.py
+"""
+import os
+import gzip
+import json
+import asyncio
+import tempfile
+
+import exporter
+
+
+class FakeSource:
+    """Lists item IDs in fixed batches; `failures` lists IDs whose next fetch fails once."""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.failures = set()
+        self.fetched = []
+
+    async def list_batch(self, cursor):
+        index = cursor or 0
+        next_cursor = index + 1 if index + 1 < len(self.batches) else None
+        return [{"id": i} for i in self.batches[index]], next_cursor
+
+    async def fetch_record(self, item):
+        await asyncio.sleep(0)
+        if item["id"] in self.failures:
+            self.failures.discard(item["id"])
+            raise RuntimeError(f"fetch of {item['id']} failed")
+        self.fetched.append(item["id"])
+        return {"id": item["id"], "body": f"record {item['id']}"}
+
+
+def read_records(path):
+    with gzip.open(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+def export(source, path):
+    return asyncio.run(exporter.run_export(path, "fake:1", source.list_batch, source.fetch_record, concurrency=2))
+
+
+def test_resumes_after_failed_batch_without_duplicates():
+    source = FakeSource([[1, 2], [3, 4], [5]])
+    source.failures.add(4)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.jsonl.gz")
+        try:
+            export(source, path)
+            failed = False
+        except RuntimeError:
+            failed = True
+        with open(f"{path}.checkpoint.json") as f:
+            checkpoint = json.load(f)
+
+        result = export(source, path)
+        records = read_records(path)
+        with open(f"{path}.checkpoint.json") as f:
+            final = json.load(f)
+
+    assert failed
+    assert checkpoint["records"] == 2 and checkpoint["cursor"] == 1 and not checkpoint["complete"]
+    assert result["resumed"] and result["records"] == 5
+    assert sorted(r["id"] for r in records) == [1, 2, 3, 4, 5]
+    assert final["complete"]
+
+
+def test_completed_export_starts_over():
+    source = FakeSource([[1], [2]])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.jsonl.gz")
+        export(source, path)
+        again = export(source, path)
+        records = read_records(path)
+
+    assert not again["resumed"]
+    assert [r["id"] for r in records] == [1, 2]
+
+
+def test_listing_error_is_raised():
+    async def broken_listing(cursor):
+        raise RuntimeError("listing failed")
+
+    async def run(path):
+        await exporter.run_export(path, "fake:1", broken_listing, FakeSource([]).fetch_record)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            asyncio.run(asyncio.wait_for(run(os.path.join(tmp, "export.jsonl.gz")), timeout=5))
+            raised = False
+        except RuntimeError:
+            raised = True
+    assert raised
+
+
+def test_confluence_export_continues_past_short_batches():
+    class FakeConfluence:
+        """Returns at most two pages per request, whatever limit is asked for."""
+
+        def __init__(self, count):
+            self.count = count
+
+        async def list_page_batch(self, space_key, limit, start):
+            pages = [{"id": str(i)} for i in range(start, min(start + 2, self.count))]
+            return pages, start + len(pages) < self.count
+
+        async def get_page(self, page_id):
+            return {"id": page_id}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "space.jsonl.gz")
+        result = asyncio.run(exporter.export_confluence_space(FakeConfluence(5), "DOCS", path, page_size=50))
+        records = read_records(path)
+
+    assert result["records"] == 5
+    assert sorted(int(r["id"]) for r in records) == [0, 1, 2, 3, 4]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,82 @@
+"""Checks anchored page edits against storage-format bodies with nested headings.
+
+Run with pytest, or directly: python test_page_patch.py
+"""
+from page_patch import find_section, apply_edits
+
+BODY = (
+    "<h1>Guide</h1><p>intro</p>"
+    "<h2>Setup</h2><p>install</p>"
+    "<h3>Linux</h3><p>apt</p>"
+    "<h2 id=\"usage\">Usage &amp; <em>Tips</em></h2><p>run it</p>"
+    "<h1>Appendix</h1><p>links</p>"
+)
+
+
+def fails(edits, message):
+    try:
+        apply_edits(BODY, edits)
+    except ValueError as e:
+        assert message in str(e), str(e)
+        return True
+    return False
+
+
+def test_section_includes_deeper_headings():
+    start, end = find_section(BODY, "Setup")
+    assert BODY[start:end] == "<p>install</p><h3>Linux</h3><p>apt</p>"
+
+
+def test_replace_section_stops_at_same_level():
+    body = apply_edits(BODY, [{"op": "replace_section", "heading": "setup", "content": "<p>pip</p>"}])
+    assert "<h2>Setup</h2><p>pip</p><h2 id=\"usage\">" in body
+    assert "Linux" not in body
+
+
+def test_append_to_section_with_markup_in_heading():
+    body = apply_edits(BODY, [{"op": "append_to_section", "heading": "Usage & Tips", "content": "<p>more</p>"}])
+    assert "<p>run it</p><p>more</p><h1>Appendix</h1>" in body
+
+
+def test_append_to_last_section_appends_to_body():
+    body = apply_edits(BODY, [{"op": "append_to_section", "heading": "Appendix", "content": "<p>end</p>"}])
+    assert body.endswith("<p>links</p><p>end</p>")
+
+
+def test_top_level_section_runs_to_next_top_level_heading():
+    body = apply_edits(BODY, [{"op": "replace_section", "heading": "Guide", "content": "<p>new</p>"}])
+    assert body == "<h1>Guide</h1><p>new</p><h1>Appendix</h1><p>links</p>"
+
+
+def test_ambiguous_replace_text_is_rejected():
+    body = "<p>old</p><p>old</p>"
+    try:
+        apply_edits(body, [{"op": "replace_text", "old": "old", "new": "new"}])
+        rejected = False
+    except ValueError as e:
+        rejected = "occurs 2 times" in str(e)
+    assert rejected
+    assert apply_edits(body, [{"op": "replace_text", "old": "old", "new": "new", "count": 1}]) == "<p>new</p><p>old</p>"
+    assert apply_edits(body, [{"op": "replace_text", "old": "old", "new": "new", "count": -1}]) == "<p>new</p><p>new</p>"
+
+
+def test_failing_edit_aborts_patch():
+    assert fails([{"op": "append", "content": "x"}, {"op": "replace_section", "heading": "Missing", "content": ""}], "Edit 1: Heading not found")
+    assert fails([{"op": "replace_text", "old": "intro"}], "Edit 0 is missing 'new'")
+
+
+def test_ambiguous_heading_is_rejected():
+    body = "<h2>Notes</h2><p>a</p><h2>Notes</h2><p>b</p>"
+    try:
+        find_section(body, "Notes")
+        rejected = False
+    except ValueError as e:
+        rejected = "ambiguous" in str(e)
+    assert rejected
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,357 @@
+"""Exercises the resilience layer against a local fake server that injects faults.
+
+Run with pytest, or directly: python test_resilience.py
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import httpx
+from resilience import ResilientTransport, CircuitOpenError, endpoint_key, bulk_transfer
+
+
+class FaultyServer:
+    """Serves JSON on localhost. Faults are set per path prefix:
+    {"delay": seconds, "delay_at": n, "fail": n, "status": code, "drip": (chunks, interval)}.
+
+    `delay_at` limits the delay to the n-th request (0-based) of that prefix,
+    `fail` answers the first n requests with `status` (default 503) and `drip`
+    sends a binary body as `chunks` 1 KiB writes `interval` seconds apart.
+    """
+
+    def __init__(self):
+        self.faults = {}
+        self.hits = {}
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.handle(self)
+
+            def do_PUT(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def handle(self, handler):
+        path = handler.path.split("?")[0]
+        prefix = next((p for p in self.faults if path.startswith(p)), None)
+        fault = self.faults.get(prefix, {})
+        with self.lock:
+            count = self.hits.get(prefix, 0)
+            self.hits[prefix] = count + 1
+        if fault.get("delay") and fault.get("delay_at", count) == count:
+            time.sleep(fault["delay"])
+        status = fault.get("status", 503) if count < fault.get("fail", 0) else 200
+        if fault.get("drip"):
+            chunks, interval = fault["drip"]
+            handler.send_response(status)
+            handler.send_header("Content-Length", str(chunks * 1024))
+            handler.end_headers()
+            for _ in range(chunks):
+                handler.wfile.write(b"x" * 1024)
+                handler.wfile.flush()
+                time.sleep(interval)
+            return
+        body = json.dumps({"path": path, "hit": count, "version": {"number": 1}}).encode()
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@asynccontextmanager
+async def closing(transport):
+    try:
+        yield transport
+    finally:
+        await transport.close()
+
+
+def make_transport(**kwargs):
+    options = {"hedge": True, "serve_stale": False, "read_deadline": 5, "write_deadline": 5, "deadlines": {}, "failure_threshold": 3, "reset_timeout": 0.5}
+    options.update(kwargs)
+    return ResilientTransport(**options)
+
+
+def test_endpoint_key_collapses_ids():
+    request = httpx.Request("GET", "https://x.atlassian.net/rest/api/3/issue/PROJ-12/comment")
+    assert endpoint_key(request) == "GET /rest/api/3/issue/{id}/comment"
+    request = httpx.Request("GET", "https://x.atlassian.net/wiki/rest/api/content/98304")
+    assert endpoint_key(request) == "GET /wiki/rest/api/content/{id}"
+
+
+def test_hedge_beats_slow_primary():
+    server = FaultyServer()
+    # Only the 31st request is slow; its hedge is answered immediately.
+    server.faults["/fast"] = {"delay": 2.0, "delay_at": 30}
+    transport = make_transport()
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            for _ in range(30):
+                (await client.get(f"{server.url}/fast/1")).raise_for_status()
+            started = time.monotonic()
+            response = await client.get(f"{server.url}/fast/1")
+            return response, time.monotonic() - started
+
+    try:
+        response, elapsed = asyncio.run(run())
+    finally:
+        server.close()
+    assert response.status_code == 200
+    assert elapsed < 1.0
+    assert transport.stats["hedged"] == 1
+    assert transport.stats["hedge_wins"] == 1
+
+
+def test_no_hedge_without_samples():
+    server = FaultyServer()
+    server.faults["/slow"] = {"delay": 0.3}
+    transport = make_transport()
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            return await client.get(f"{server.url}/slow/1")
+
+    try:
+        response = asyncio.run(run())
+    finally:
+        server.close()
+    assert response.status_code == 200
+    assert transport.stats["hedged"] == 0
+    assert server.hits["/slow"] == 1
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    server = FaultyServer()
+    server.faults["/flaky"] = {"fail": 3}
+    transport = make_transport()
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            statuses = [(await client.get(f"{server.url}/flaky/{i}")).status_code for i in range(3)]
+            try:
+                await client.get(f"{server.url}/flaky/4")
+                short_circuited = False
+            except CircuitOpenError:
+                short_circuited = True
+            hits_while_open = server.hits["/flaky"]
+            await asyncio.sleep(0.6)
+            # Half-open: the trial succeeds and closes the breaker again.
+            recovered = (await client.get(f"{server.url}/flaky/5")).status_code
+            return statuses, short_circuited, hits_while_open, recovered
+
+    try:
+        statuses, short_circuited, hits_while_open, recovered = asyncio.run(run())
+    finally:
+        server.close()
+    assert statuses == [503, 503, 503]
+    assert short_circuited
+    assert hits_while_open == 3
+    assert recovered == 200
+    assert transport.report()["open_circuits"] == []
+
+
+def test_failed_trial_reopens_breaker():
+    server = FaultyServer()
+    server.faults["/down"] = {"fail": 100}
+    transport = make_transport()
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            for _ in range(3):
+                await client.get(f"{server.url}/down")
+            await asyncio.sleep(0.6)
+            trial = (await client.get(f"{server.url}/down")).status_code
+            try:
+                await client.get(f"{server.url}/down")
+                return trial, False
+            except CircuitOpenError:
+                return trial, True
+
+    try:
+        trial, short_circuited = asyncio.run(run())
+    finally:
+        server.close()
+    assert trial == 503
+    assert short_circuited
+    assert server.hits["/down"] == 4
+
+
+def test_serves_stale_while_open():
+    server = FaultyServer()
+    transport = make_transport(serve_stale=True)
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            fresh = (await client.get(f"{server.url}/page/7")).json()
+            server.faults["/page"] = {"fail": 100}
+            server.hits["/page"] = 0
+            for _ in range(3):
+                await client.get(f"{server.url}/page/8")
+            stale = await client.get(f"{server.url}/page/7")
+            return fresh, stale
+
+    try:
+        fresh, stale = asyncio.run(run())
+    finally:
+        server.close()
+    assert stale.status_code == 200
+    assert stale.headers["X-Served-Stale"] == "true"
+    assert stale.json() == fresh
+    assert transport.stats["served_stale"] == 1
+
+
+def test_deadline_exceeded():
+    server = FaultyServer()
+    server.faults["/hang"] = {"delay": 2.0}
+    transport = make_transport(hedge=False, deadlines={"GET /hang": 0.3})
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            started = time.monotonic()
+            try:
+                await client.get(f"{server.url}/hang")
+            except httpx.TimeoutException:
+                return time.monotonic() - started
+        return None
+
+    try:
+        elapsed = asyncio.run(run())
+    finally:
+        server.close()
+    assert elapsed is not None and elapsed < 1.0
+    assert transport.stats["deadline_exceeded"] == 1
+
+
+def test_bulk_transfer_outlives_deadline_without_hedging():
+    server = FaultyServer()
+    # 10 chunks 0.1s apart: about 1s in total, past the 0.3s deadline, never stalled.
+    server.faults["/download"] = {"drip": (10, 0.1)}
+    transport = make_transport(read_deadline=0.3, transfer_timeout=0.5)
+    # Enough fast samples that a normal GET to this endpoint would be hedged.
+    transport._latencies["GET /download/{id}"] = [0.01] * 50
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            with bulk_transfer():
+                return await client.get(f"{server.url}/download/1")
+
+    try:
+        response = asyncio.run(run())
+    finally:
+        server.close()
+    assert len(response.content) == 10 * 1024
+    assert transport.stats["hedged"] == 0
+    assert transport.stats["deadline_exceeded"] == 0
+    assert server.hits["/download"] == 1
+
+
+def test_bulk_transfer_stall_times_out():
+    server = FaultyServer()
+    server.faults["/download"] = {"drip": (2, 1.0)}
+    transport = make_transport(transfer_timeout=0.3)
+
+    async def run():
+        async with closing(transport), httpx.AsyncClient(transport=transport, timeout=None) as client:
+            with bulk_transfer():
+                try:
+                    await client.get(f"{server.url}/download/1")
+                except httpx.ReadTimeout:
+                    return True
+        return False
+
+    try:
+        assert asyncio.run(run())
+    finally:
+        server.close()
+
+
+def test_clients_use_resilient_transport():
+    server = FaultyServer()
+    server.faults["/rest/api/3/issue"] = {"fail": 1}
+    os.environ.update({
+        "JIRA_URL": f"{server.url}/rest/api/3",
+        "CONFLUENCE_URL": f"{server.url}/wiki",
+        "ATLASSIAN_USERNAME": "user",
+        "ATLASSIAN_API_KEY": "key",
+    })
+    from jira_client import JiraClient
+    from confluence_client import ConfluenceClient
+    jira = JiraClient()
+    confluence = ConfluenceClient()
+
+    async def run():
+        async with closing(jira.transport), closing(confluence.transport):
+            try:
+                await jira.get_issue("PROJ-1")
+                first_failed = False
+            except httpx.HTTPStatusError:
+                first_failed = True
+            return first_failed, await jira.get_issue("PROJ-1"), await confluence.get_page_version("42")
+
+    try:
+        first_failed, issue, version = asyncio.run(run())
+    finally:
+        server.close()
+    assert first_failed
+    assert issue["path"] == "/rest/api/3/issue/PROJ-1"
+    assert version == 1
+    assert jira.transport.stats["requests"] == 2
+    assert confluence.transport.stats["requests"] == 1
+
+
+def test_cancelled_requests_stay_cancelled():
+    # Closing a page-tree crawl early cancels workers whose requests complete at that
+    # moment; a swallowed cancellation left them blocked and the close hung.
+    os.environ.update({"CONFLUENCE_URL": "http://confluence.test/wiki", "ATLASSIAN_USERNAME": "user", "ATLASSIAN_API_KEY": "key"})
+    from confluence_client import ConfluenceClient
+
+    def handler(request):
+        page_id = request.url.path.split("/")[-3 if request.url.path.endswith("/child/page") else -1]
+        if request.url.path.endswith("/child/page"):
+            children = [{"id": f"{page_id}{k}", "title": "t", "version": {"number": 1}} for k in range(1, 4)] if len(page_id) < 3 else []
+            return httpx.Response(200, json={"results": children, "_links": {}})
+        return httpx.Response(200, json={"id": page_id, "title": "t", "version": {"number": 1}})
+
+    confluence = ConfluenceClient()
+    confluence.transport = make_transport(inner=httpx.MockTransport(handler))
+
+    async def run():
+        crawl = confluence.crawl_page_tree("1")
+        try:
+            async for node in crawl:
+                if node["id"] == "12":
+                    break
+        finally:
+            await crawl.aclose()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,209 @@
+"""Exercises the write-behind queue with fake handlers that fail on demand.
+
+Run with pytest, or directly: python test_write_queue.py
+"""
+import os
+import asyncio
+import tempfile
+
+import httpx
+from write_queue import WriteQueue
+
+
+def http_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("PUT", "https://example.atlassian.net/rest/api/3/issue/P-1")
+    return httpx.HTTPStatusError(f"{status}", request=request, response=httpx.Response(status, request=request))
+
+
+class FakeJira:
+    """Records applied writes; `failures` maps a value to the errors its next attempts raise."""
+
+    def __init__(self):
+        self.summary = {}
+        self.comments = []
+        self.failures = {}
+
+    def _maybe_fail(self, value):
+        errors = self.failures.get(value)
+        if errors:
+            raise errors.pop(0)
+
+    async def update_issue(self, issue_key, fields):
+        await asyncio.sleep(0.01)
+        self._maybe_fail(fields["summary"])
+        self.summary[issue_key] = fields["summary"]
+        return True
+
+    async def add_comment(self, issue_key, comment):
+        self._maybe_fail(comment)
+        self.comments.append((issue_key, comment))
+        return {"id": str(len(self.comments))}
+
+
+def make_queue(jira, path, **kwargs):
+    queue = WriteQueue({
+        "jira_update_issue": jira.update_issue,
+        "jira_add_comment": jira.add_comment,
+    }, db_path=path, concurrency=4, non_idempotent={"jira_add_comment"}, **kwargs)
+    queue.backoff_base = 0.05
+    return queue
+
+
+async def drain(queue, ids, timeout=5.0):
+    async def wait():
+        while any(queue.status(i)["status"] in ("pending", "running") for i in ids):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(wait(), timeout)
+    await queue.stop()
+
+
+def test_retried_write_does_not_overwrite_later_one():
+    jira = FakeJira()
+    jira.failures["v1"] = [http_error(503)]
+
+    async def run(path):
+        queue = make_queue(jira, path)
+        ids = [
+            queue.enqueue("jira_update_issue", {"issue_key": "P-1", "fields": {"summary": "v1"}}),
+            queue.enqueue("jira_update_issue", {"issue_key": "P-1", "fields": {"summary": "v2"}}),
+        ]
+        await drain(queue, ids)
+        return [queue.status(i) for i in ids]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, second = asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert first["status"] == "done" and first["attempts"] == 2
+    assert second["status"] == "done"
+    assert jira.summary["P-1"] == "v2"
+
+
+def test_other_targets_are_not_blocked():
+    jira = FakeJira()
+    jira.failures["slow"] = [http_error(503), http_error(503)]
+
+    async def run(path):
+        queue = make_queue(jira, path)
+        blocked = queue.enqueue("jira_update_issue", {"issue_key": "P-1", "fields": {"summary": "slow"}})
+        other = queue.enqueue("jira_update_issue", {"issue_key": "P-2", "fields": {"summary": "fast"}})
+        await asyncio.sleep(0.05)
+        other_done_first = queue.status(other)["status"] == "done" and queue.status(blocked)["status"] == "pending"
+        await drain(queue, [blocked, other])
+        return other_done_first
+
+    with tempfile.TemporaryDirectory() as tmp:
+        assert asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert jira.summary == {"P-1": "slow", "P-2": "fast"}
+
+
+def test_comment_not_reposted_after_timeout():
+    jira = FakeJira()
+    jira.failures["hello"] = [httpx.ReadTimeout("timed out")]
+
+    async def run(path):
+        queue = make_queue(jira, path)
+        tracking_id = queue.enqueue("jira_add_comment", {"issue_key": "P-1", "comment": "hello"})
+        await drain(queue, [tracking_id])
+        return queue.status(tracking_id), queue.summary()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status, summary = asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert status["status"] == "unknown"
+    assert status["attempts"] == 1
+    assert jira.comments == []
+    assert summary["recent_failures"][0]["status"] == "unknown"
+
+
+def test_comment_retried_when_rejected():
+    jira = FakeJira()
+    jira.failures["hello"] = [http_error(429), httpx.ConnectError("refused")]
+
+    async def run(path):
+        queue = make_queue(jira, path)
+        tracking_id = queue.enqueue("jira_add_comment", {"issue_key": "P-1", "comment": "hello"})
+        await drain(queue, [tracking_id])
+        return queue.status(tracking_id)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status = asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert status["status"] == "done" and status["attempts"] == 3
+    assert jira.comments == [("P-1", "hello")]
+
+
+def test_skipped_write_is_reported():
+    async def unchanged(issue_key, fields):
+        return {"skipped": True, "reason": "already has this content"}
+
+    async def run(path):
+        queue = WriteQueue({"jira_update_issue": unchanged}, db_path=path)
+        tracking_id = queue.enqueue("jira_update_issue", {"issue_key": "P-1", "fields": {"summary": "same"}})
+        await drain(queue, [tracking_id])
+        return queue.status(tracking_id)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status = asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert status["status"] == "skipped"
+    assert status["result"]["reason"] == "already has this content"
+
+
+def test_permanent_failure_and_idempotency_key():
+    jira = FakeJira()
+    jira.failures["bad"] = [http_error(400)]
+
+    async def run(path):
+        queue = make_queue(jira, path)
+        first = queue.enqueue("jira_update_issue", {"issue_key": "P-1", "fields": {"summary": "bad"}}, idempotency_key="k1")
+        again = queue.enqueue("jira_update_issue", {"issue_key": "P-1", "fields": {"summary": "bad"}}, idempotency_key="k1")
+        await drain(queue, [first])
+        return first, again, queue.status(first)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        first, again, status = asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert first == again
+    assert status["status"] == "failed" and status["attempts"] == 1
+
+
+def test_pending_writes_resume_in_order_after_restart():
+    jira = FakeJira()
+
+    async def run(path):
+        queue = make_queue(jira, path)
+        ids = [queue.enqueue("jira_update_issue", {"issue_key": "P-1", "fields": {"summary": s}}) for s in ("v1", "v2", "v3")]
+        await queue.stop()
+        restarted = make_queue(jira, path)
+        restarted.start()
+        await drain(restarted, ids)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert jira.summary["P-1"] == "v3"
+
+
+def test_comment_left_running_is_not_reposted_after_restart():
+    jira = FakeJira()
+
+    async def run(path):
+        queue = make_queue(jira, path)
+        comment = queue.enqueue("jira_add_comment", {"issue_key": "P-1", "comment": "hello"})
+        update = queue.enqueue("jira_update_issue", {"issue_key": "P-2", "fields": {"summary": "v1"}})
+        await queue.stop()
+        # Simulate a process that died with both requests in flight.
+        queue.db.execute("UPDATE mutations SET status = 'running', attempts = 1")
+        queue.db.commit()
+        restarted = make_queue(jira, path)
+        restarted.start()
+        await drain(restarted, [comment, update])
+        return restarted.status(comment), restarted.status(update)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        comment, update = asyncio.run(run(os.path.join(tmp, "queue.db")))
+    assert comment["status"] == "unknown"
+    assert jira.comments == []
+    assert update["status"] == "done"
+    assert jira.summary["P-2"] == "v1"
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name}: ok")
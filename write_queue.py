@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import uuid
+import httpx
+import asyncio
+import sqlite3
+import logging
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from resilience import CircuitOpenError
+
+logger = logging.getLogger("atlassian-mcp.write_queue")
+
+# Upstream responses worth retrying. Anything else (400, 403, 404, ...) fails permanently.
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Failures after which a write was certainly not applied upstream, so even a
+# non-idempotent write (a comment POST) can be sent again.
+REJECTED_STATUS_CODES = {429, 503}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mutations (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    op TEXT NOT NULL,
+    target TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mutations_due ON mutations (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS mutations_target ON mutations (target, status);
+"""
+
+# A pending row is only due once no earlier write to the same issue/page is still
+# pending or running, so writes to one target land in the order they were queued.
+HEAD_OF_TARGET = """
+NOT EXISTS (
+    SELECT 1 FROM mutations earlier
+    WHERE earlier.target = mutations.target AND earlier.rowid < mutations.rowid
+    AND earlier.status IN ('pending', 'running')
+)
+"""
+
+
+def write_target(payload: Dict[str, Any]) -> Optional[str]:
+    """The issue or page a mutation writes to."""
+    if payload.get("issue_key"):
+        return f"issue:{payload['issue_key']}"
+    if payload.get("page_id"):
+        return f"page:{payload['page_id']}"
+    return None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Returns True if a failed mutation is worth retrying."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def was_rejected(error: Exception) -> bool:
+    """Returns True if a failed mutation certainly never reached (or was refused by) the server.
+
+    Timeouts, dropped connections and gateway errors are ambiguous: the write may
+    have been applied even though no success response arrived.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in REJECTED_STATUS_CODES
+    return isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, CircuitOpenError))
+
+
+class WriteQueue:
+    """Durable write-behind queue for Jira/Confluence mutations.
+
+    Mutations are journaled to SQLite before being acknowledged, then drained by a
+    bounded pool of workers. Rows survive restarts: anything still pending (or left
+    running by a crashed process) is picked up again on the next start, except
+    non-idempotent writes left running, which end in status "unknown".
+
+    Writes to the same issue or page run one at a time, in queue order. Operations
+    listed in `non_idempotent` (e.g. adding a comment) are only retried when the
+    failure shows the write was not applied; after an ambiguous failure (timeout,
+    dropped connection) they end in status "unknown" instead of risking a duplicate.
+    A handler returning a dict with "skipped" set ends the write in status "skipped".
+    """
+
+    def __init__(self, handlers: Dict[str, Callable[..., Awaitable[Any]]], db_path: Optional[str] = None, concurrency: Optional[int] = None, max_attempts: Optional[int] = None, non_idempotent: Optional[set] = None):
+        self.handlers = handlers
+        self.non_idempotent = non_idempotent or set()
+        self.db_path = db_path or os.getenv("ATLASSIAN_WRITE_QUEUE_DB")
+        self.concurrency = concurrency or int(os.getenv("ATLASSIAN_WRITE_QUEUE_CONCURRENCY", "4"))
+        self.max_attempts = max_attempts or int(os.getenv("ATLASSIAN_WRITE_QUEUE_MAX_ATTEMPTS", "5"))
+        self.backoff_base = 1.0
+        self.backoff_max = 300.0
+
+        if not self.db_path:
+            raise ValueError("No write queue database configured (ATLASSIAN_WRITE_QUEUE_DB)")
+
+        self.db = sqlite3.connect(self.db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        # A previous process may have died mid-request. Those rows go back in line,
+        # except non-idempotent ones: their request may already have been applied.
+        ambiguous = sorted(self.non_idempotent)
+        placeholders = ", ".join("?" for _ in ambiguous)
+        self.db.execute(
+            f"UPDATE mutations SET status = 'unknown', last_error = 'Outcome unknown: the process stopped during the request; not retried to avoid a duplicate', "
+            f"updated_at = ? WHERE status = 'running' AND op IN ({placeholders})",
+            (time.time(), *ambiguous)
+        )
+        self.db.execute("UPDATE mutations SET status = 'pending' WHERE status = 'running'")
+        self.db.commit()
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Starts the drain workers on the running event loop (idempotent)."""
+        if self._workers and not all(w.done() for w in self._workers):
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        logger.info(f"Write queue started with {self.concurrency} workers ({self.db_path})")
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def enqueue(self, op: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None) -> str:
+        """Journals a mutation and returns its tracking ID.
+
+        Re-submitting with an idempotency key that is already known returns the
+        original tracking ID instead of queuing a duplicate write.
+        """
+        if op not in self.handlers:
+            raise ValueError(f"Unknown write queue operation: {op}")
+
+        if idempotency_key:
+            row = self.db.execute("SELECT id FROM mutations WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+            if row:
+                logger.info(f"Duplicate submission for idempotency key '{idempotency_key}', returning {row['id']}")
+                return row["id"]
+
+        tracking_id = uuid.uuid4().hex
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO mutations (id, idempotency_key, op, target, payload, status, created_at, updated_at, next_attempt_at) "
+            "VALUES (?, ?, ?, ?, ?, 'pending', ?, ?, ?)",
+            (tracking_id, idempotency_key, op, write_target(payload), json.dumps(payload), now, now, now)
+        )
+        self.db.commit()
+        logger.debug(f"Queued {op} as {tracking_id}")
+
+        self.start()
+        self._wakeup.set()
+        return tracking_id
+
+    def status(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.execute("SELECT * FROM mutations WHERE id = ?", (tracking_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            "id": row["id"],
+            "op": row["op"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "last_error": row["last_error"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def summary(self, recent_failures: int = 10) -> Dict[str, Any]:
+        counts = {
+            row["status"]: row["n"]
+            for row in self.db.execute("SELECT status, COUNT(*) AS n FROM mutations GROUP BY status")
+        }
+        failures = [
+            {"id": row["id"], "op": row["op"], "status": row["status"], "attempts": row["attempts"], "last_error": row["last_error"]}
+            for row in self.db.execute(
+                "SELECT id, op, status, attempts, last_error FROM mutations WHERE status IN ('failed', 'unknown') ORDER BY updated_at DESC LIMIT ?",
+                (recent_failures,)
+            )
+        ]
+        return {"counts": counts, "recent_failures": failures}
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically moves the next due row from pending to running."""
+        row = self.db.execute(
+            f"SELECT * FROM mutations WHERE status = 'pending' AND next_attempt_at <= ? AND {HEAD_OF_TARGET} ORDER BY rowid LIMIT 1",
+            (time.time(),)
+        ).fetchone()
+        if not row:
+            return None
+        cursor = self.db.execute(
+            "UPDATE mutations SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE id = ? AND status = 'pending'",
+            (time.time(), row["id"])
+        )
+        self.db.commit()
+        return row if cursor.rowcount else None
+
+    def _next_due_in(self) -> Optional[float]:
+        row = self.db.execute(f"SELECT MIN(next_attempt_at) AS due FROM mutations WHERE status = 'pending' AND {HEAD_OF_TARGET}").fetchone()
+        if row["due"] is None:
+            return None
+        return max(0.0, row["due"] - time.time())
+
+    def _finish(self, tracking_id: str, status: str, error: Optional[str] = None, result: Any = None, retry_in: float = 0.0) -> None:
+        now = time.time()
+        self.db.execute(
+            "UPDATE mutations SET status = ?, last_error = ?, result = ?, updated_at = ?, next_attempt_at = ? WHERE id = ?",
+            (status, error, json.dumps(result, default=str) if result is not None else None, now, now + retry_in, tracking_id)
+        )
+        self.db.commit()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            row = self._claim()
+            if row is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_due_in())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(row)
+
+    async def _run(self, row: sqlite3.Row) -> None:
+        tracking_id = row["id"]
+        attempt = row["attempts"] + 1
+        handler = self.handlers[row["op"]]
+        try:
+            result = await handler(**json.loads(row["payload"]))
+            if isinstance(result, dict) and result.get("skipped"):
+                self._finish(tracking_id, "skipped", result=result)
+                logger.info(f"Write {tracking_id} ({row['op']}) skipped: {result.get('reason', 'no change')}")
+            else:
+                if isinstance(result, dict):
+                    result = {k: result[k] for k in ("id", "key") if k in result}
+                self._finish(tracking_id, "done", result=result)
+                logger.info(f"Write {tracking_id} ({row['op']}) completed on attempt {attempt}")
+        except Exception as e:
+            if row["op"] in self.non_idempotent and is_transient_error(e) and not was_rejected(e):
+                self._finish(tracking_id, "unknown", error=f"Outcome unknown, not retried to avoid a duplicate: {e}")
+                logger.error(f"Write {tracking_id} ({row['op']}) may or may not have been applied: {e}")
+            elif is_transient_error(e) and attempt < self.max_attempts:
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+                self._finish(tracking_id, "pending", error=str(e), retry_in=delay)
+                logger.warning(f"Write {tracking_id} ({row['op']}) failed transiently, retrying in {delay:.1f}s: {e}")
+            else:
+                self._finish(tracking_id, "failed", error=str(e))
+                logger.error(f"Write {tracking_id} ({row['op']}) failed permanently: {e}")
+        # Wake idle workers: a new due time, or later writes to this target are unblocked.
+        self._wakeup.set()